@@ -0,0 +1,135 @@
+"""Prepare many meeting briefs from a CSV or JSONL file without the Streamlit UI.
+
+Example:
+    python batch_prep.py meetings.csv --out-dir briefs --concurrency 4 --llm-rpm 40 --search-rpm 60
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import rate_limit
+from crews import make_llms, make_search_tool, run_cached
+from meeting_inputs import BUYER_PERSPECTIVE, MEETING_FIELDS, SELLER_PERSPECTIVE, sanitize_input
+
+
+def read_specs(path):
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    # utf-8-sig drops the byte-order mark Excel's "CSV UTF-8" export starts with
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+def parse_perspective(value, default):
+    value = (value or "").strip().lower()
+    if not value:
+        return default
+    if value.startswith(("provider", "seller")):
+        return SELLER_PERSPECTIVE
+    if value.startswith(("customer", "buyer")):
+        return BUYER_PERSPECTIVE
+    raise ValueError(f"Unknown perspective '{value}', expected 'seller' or 'buyer'")
+
+
+def to_inputs(spec, defaults):
+    # Same fields and sanitization as the Meeting Preparation tab
+    merged = {**defaults, **{k: v for k, v in spec.items() if v not in (None, "")}}
+    inputs = {field: sanitize_input(str(merged.get(field, ""))) for field in MEETING_FIELDS}
+    inputs["meeting_perspective"] = parse_perspective(
+        merged.get("perspective") or merged.get("meeting_perspective"), defaults["meeting_perspective"]
+    )
+    inputs["meeting_duration"] = int(merged.get("meeting_duration") or 60)
+    if not inputs["company_name"]:
+        raise ValueError("company_name is required")
+    return inputs
+
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "meeting"
+
+
+def prepare_one(index, spec, defaults, llms, search_tool, out_dir, refresh):
+    started = time.time()
+    record = {"index": index, "company_name": spec.get("company_name", ""), "status": "failed"}
+    try:
+        inputs = to_inputs(spec, defaults)
+        entry = run_cached("meeting_prep", inputs, llms, search_tool, refresh=refresh)
+        path = os.path.join(out_dir, f"{index:03d}-{slugify(inputs['company_name'])}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(entry["output"])
+        record.update(status="ok", output=path, from_cache=entry["from_cache"], coalesced=entry.get("coalesced", False))
+        # A joined run's metrics belong to the row that ran it; don't count them twice
+        if entry.get("metrics") and not record["coalesced"]:
+            record["metrics"] = entry["metrics"]["totals"]
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.time() - started, 2)
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prepare meeting briefs in bulk from a CSV or JSONL file.")
+    parser.add_argument("specs", help="CSV or JSONL file with one meeting per row (same fields as the Meeting Preparation tab)")
+    parser.add_argument("--out-dir", default="briefs", help="Directory for the markdown briefs and summary.json")
+    parser.add_argument("--concurrency", type=int, default=4, help="Meetings prepared at the same time")
+    parser.add_argument("--llm-rpm", type=float, default=None, help="Global cap on LLM calls per minute (default: LLM_CALLS_PER_MINUTE or unlimited)")
+    parser.add_argument("--search-rpm", type=float, default=None, help="Global cap on Serper calls per minute (default: SEARCH_CALLS_PER_MINUTE or unlimited)")
+    parser.add_argument("--perspective", default="seller", help="Default perspective for rows without one: seller or buyer")
+    parser.add_argument("--your-company-name", default="", help="Default your_company_name for rows without one")
+    parser.add_argument("--your-company-description", default="", help="Default your_company_description for rows without one")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached briefs and run the agents again")
+    args = parser.parse_args(argv)
+
+    anthropic_api_key = os.environ.get("ANTHROPIC_API_KEY", "").strip()
+    if not anthropic_api_key or not os.environ.get("SERPER_API_KEY", "").strip():
+        parser.error("ANTHROPIC_API_KEY and SERPER_API_KEY must be set in the environment")
+
+    rate_limit.configure(llm_per_minute=args.llm_rpm, search_per_minute=args.search_rpm)
+    defaults = {
+        "your_company_name": args.your_company_name,
+        "your_company_description": args.your_company_description,
+        "meeting_perspective": parse_perspective(args.perspective, SELLER_PERSPECTIVE),
+    }
+    specs = read_specs(args.specs)
+    os.makedirs(args.out_dir, exist_ok=True)
+    llms = make_llms(anthropic_api_key)
+    search_tool = make_search_tool()
+
+    started = time.time()
+    records = []
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = [
+            pool.submit(prepare_one, index, spec, defaults, llms, search_tool, args.out_dir, args.refresh)
+            for index, spec in enumerate(specs, start=1)
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            detail = record.get("output") or record.get("error")
+            print(f"[{len(records)}/{len(specs)}] {record['status']:6} {record['seconds']:7.1f}s  {record['company_name']}  {detail}", flush=True)
+
+    records.sort(key=lambda record: record["index"])
+    failures = [record for record in records if record["status"] != "ok"]
+    summary = {
+        "total": len(records),
+        "succeeded": len(records) - len(failures),
+        "failed": len(failures),
+        "from_cache": sum(bool(record.get("from_cache")) for record in records),
+        "coalesced": sum(bool(record.get("coalesced")) for record in records),
+        "wall_seconds": round(time.time() - started, 2),
+        "meetings": records,
+    }
+    with open(os.path.join(args.out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Done: {summary['succeeded']} ok, {summary['failed']} failed, {summary['from_cache']} from cache, {summary['coalesced']} joined an identical run in {summary['wall_seconds']}s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
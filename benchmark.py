@@ -0,0 +1,365 @@
+"""Offline benchmark for the three crews: a stub LLM and a local fake Serper, no network or credits.
+
+Example:
+    python benchmark.py --runs 8 --concurrency 1 4 --llm-latency 0.5 --search-latency 0.1 --out bench.json
+
+Every run uses fresh inputs and bypasses the result and stage caches, so the
+numbers describe cold runs. The JSON written to --out is meant to be diffed
+across commits; a short table is printed at the end.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from meeting_inputs import MEETING_FIELDS, SELLER_PERSPECTIVE
+
+CREW_KINDS = ["meeting_prep", "discovery", "insta"]
+PERCENTILES = [50, 90, 95, 99]
+# Anthropic only caches prefixes of at least this many tokens (Sonnet/Opus)
+MIN_CACHEABLE_TOKENS = 1024
+# Facts every stub answer may repeat, the way real stages restate the same company news
+SHARED_FACTS = [
+    "The client's revenue grew 18% year over year, driven mainly by its cloud services business.",
+    "The client acquired a mid-size analytics vendor last quarter to strengthen its data offering.",
+    "A new CEO took over in January and has announced a push into the European market.",
+    "Industry analysts expect further consolidation among mid-market software vendors this year.",
+    "The client's main competitor cut prices by roughly 10% in the last two quarters.",
+    "Data residency regulation in the EU is raising compliance costs for vendors expanding there.",
+    "The client reported operating margins of 22%, up from 19% a year earlier.",
+    "Procurement decisions at the client now require sign-off from a central architecture board.",
+]
+STUB_WORDS = ["market", "revenue", "pricing", "partner", "risk", "platform", "customer", "contract", "pilot", "roadmap", "margin", "team"]
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile; stable for the small samples a benchmark produces
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-pct * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+class FakeSerperServer:
+    """Local HTTP stand-in for google.serper.dev returning deterministic fixture results."""
+
+    def __init__(self, latency=0.0, results_per_page=10):
+        self.latency = latency
+        self.results_per_page = results_per_page
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                body = json.dumps(server.search(payload)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def search(self, payload):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        query = payload.get("q", "")
+        page = int(payload.get("page") or 1)
+        num = min(int(payload.get("num") or self.results_per_page), self.results_per_page)
+        organic = []
+        for position in range(1, num + 1):
+            # Half of each page is shared by every variant of a query, so dedup has work to do
+            seed = f"{query.split()[0] if position % 2 else query}|{page}|{position}"
+            code = hashlib.sha1(seed.encode("utf-8")).hexdigest()[:11]
+            if "instagram.com" in query:
+                link = f"https://www.instagram.com/{'reel' if position % 3 == 0 else 'p'}/{code}/"
+                snippet = f"Fixture post {code} #trend{position % 4} #benchmark"
+            elif "linkedin.com" in query:
+                link = f"https://www.linkedin.com/posts/member_{code}"
+                snippet = f"Fixture LinkedIn post {code} about {query}"
+            else:
+                link = f"https://example.com/{code}"
+                snippet = f"Fixture page {code} about {query}"
+            organic.append({"title": f"Result {position} for {query}", "link": link, "snippet": snippet, "position": position})
+        return {"searchParameters": payload, "organic": organic}
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, name="fake-serper", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def make_stub_llm(model, latency=0.0, output_tokens=300, tool_calls_per_task=1, low_quality_rate=0.0, repeat_rate=0.0):
+    """Build a BaseLLM that answers with canned text and reports token usage like the real provider."""
+    from crewai import BaseLLM
+    from crewai.events.types.llm_events import LLMCallType
+    from crewai.llms.base_llm import llm_call_context
+    from crewai.llms.cache import CACHE_BREAKPOINT_KEY
+
+    written_prefixes = set()
+    stub_lock = threading.Lock()
+    # Seeded so repeated benchmark runs make the same low-quality answers
+    quality_rng = random.Random(model)
+
+    def cached_tokens(messages):
+        # Mimics Anthropic prompt caching: an entry is written at every cache breakpoint,
+        # and a request reads the longest written prefix ending on a message boundary
+        prefix, boundaries, breakpoints = "", [], []
+        for message in messages:
+            prefix += str(message.get("content", ""))
+            digest = hashlib.sha1(prefix.encode("utf-8")).hexdigest()
+            boundaries.append((digest, len(prefix) // 4))
+            if message.get(CACHE_BREAKPOINT_KEY) and len(prefix) // 4 >= MIN_CACHEABLE_TOKENS:
+                breakpoints.append(digest)
+        with stub_lock:
+            cached = max((tokens for digest, tokens in boundaries if digest in written_prefixes), default=0)
+            written_prefixes.update(breakpoints)
+        return cached
+
+    class StubLLM(BaseLLM):
+        latency: float = 0.0
+        output_tokens: int = 300
+        tool_calls_per_task: int = 1
+        low_quality_rate: float = 0.0
+        repeat_rate: float = 0.0
+
+        def call(self, messages, *args, **kwargs):
+            with llm_call_context():
+                self._emit_call_started_event(messages=messages)
+                time.sleep(self.latency)
+                if isinstance(messages, str):
+                    messages = [{"role": "user", "content": messages}]
+                response = self._respond(messages)
+                # ~4 characters per token, the usual rule of thumb for English prompts
+                input_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+                output_tokens = len(response) // 4
+                usage = {
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "total_tokens": input_tokens + output_tokens,
+                    "cached_prompt_tokens": cached_tokens(messages),
+                }
+                self._emit_call_completed_event(response=response, call_type=LLMCallType.LLM_CALL, messages=messages, usage=usage)
+                return response
+
+        def _respond(self, messages):
+            # Agents with a search tool first ask for up to N searches, then answer; every
+            # earlier assistant turn in the transcript is one finished tool step
+            tool = re.search(r"Tool Name: (.+)", "\n".join(str(m.get("content", "")) for m in messages))
+            steps = sum(1 for m in messages if m.get("role") == "assistant")
+            if tool and steps < self.tool_calls_per_task:
+                query = f"benchmark query {steps + 1}"
+                return f'Thought: I should search first\nAction: {tool.group(1).strip()}\nAction Input: {{"search_query": "{query}"}}'
+            with stub_lock:
+                low_quality = quality_rng.random() < self.low_quality_rate
+            if low_quality:
+                return "Thought: I now know the final answer\nFinal Answer: I cannot find enough information."
+            return f"Thought: I now know the final answer\nFinal Answer: {self._report(messages)}"
+
+        def _report(self, messages):
+            # Markdown sections of bullets, seeded by the prompt so every stage answers differently;
+            # repeat_rate of the bullets restate SHARED_FACTS, which later stages can drop
+            rng = random.Random(hashlib.sha1(str(messages[-1].get("content", "")).encode("utf-8")).hexdigest())
+            lines = ["# Benchmark Report"]
+            while sum(len(line) + 1 for line in lines) < self.output_tokens * 4:
+                if len(lines) % 6 == 1:
+                    lines.append(f"## Section {len(lines) // 6 + 1}")
+                if rng.random() < self.repeat_rate:
+                    lines.append(f"- {rng.choice(SHARED_FACTS)}")
+                else:
+                    words = [f"{rng.choice(STUB_WORDS)}{rng.randrange(1000)}" for _ in range(12)]
+                    lines.append(f"- {' '.join(words).capitalize()}.")
+            return "\n".join(lines)
+
+        def supports_function_calling(self):
+            return False
+
+    return StubLLM(
+        model=model, latency=latency, output_tokens=output_tokens,
+        tool_calls_per_task=tool_calls_per_task, low_quality_rate=low_quality_rate, repeat_rate=repeat_rate,
+    )
+
+
+def bench_inputs(kind, index):
+    # Unique inputs per run so nothing is served from the search, stage or result caches
+    tag = f"bench{index:04d}"
+    if kind == "meeting_prep":
+        inputs = {field: f"{field.replace('_', ' ')} {tag}" for field in MEETING_FIELDS}
+        inputs["meeting_perspective"] = SELLER_PERSPECTIVE
+        inputs["meeting_duration"] = 60
+        return inputs
+    if kind == "discovery":
+        return {"discovery_term": f"topic {tag}", "discovery_region": "India"}
+    return {"insta_topic": f"trend {tag}", "insta_region": "India"}
+
+
+def bench_crew(kind, runs, concurrency, llms, search_tool, crews, offset):
+    def run_one(index):
+        entry = crews.run_cached(kind, bench_inputs(kind, offset + index), llms, search_tool, refresh=True)
+        return entry["metrics"]
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        summaries = list(pool.map(run_one, range(runs)))
+    wall = time.monotonic() - started
+    totals = [summary["totals"] for summary in summaries]
+    latencies = [run["seconds"] for run in totals]
+
+    def total(field):
+        return sum(run[field] for run in totals)
+
+    tiers = {}
+    for summary in summaries:
+        for model in summary["models"]:
+            tier = tiers.setdefault(crews.model_tier(model["model"]) or model["model"], {"llm_calls": 0, "llm_seconds": 0.0, "cost_usd": 0.0})
+            for field in tier:
+                tier[field] += model[field]
+    for tier in tiers.values():
+        tier["mean_llm_seconds"] = round(tier["llm_seconds"] / tier["llm_calls"], 3) if tier["llm_calls"] else 0.0
+        tier["llm_seconds"] = round(tier["llm_seconds"], 3)
+        tier["cost_usd"] = round(tier["cost_usd"], 4)
+
+    return {
+        "kind": kind,
+        "runs": runs,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput_runs_per_minute": round(runs / wall * 60, 2) if wall else 0.0,
+        "latency_seconds": {
+            **{f"p{pct}": round(percentile(latencies, pct), 3) for pct in PERCENTILES},
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "max": round(max(latencies), 3),
+        },
+        "llm_calls": total("llm_calls"),
+        "llm_seconds": round(total("llm_seconds"), 3),
+        "tool_calls": total("tool_calls"),
+        "search_calls": total("search_calls"),
+        "search_cache_hits": total("search_cache_hits"),
+        "input_tokens": total("input_tokens"),
+        "cached_tokens": total("cached_tokens"),
+        "cached_token_ratio": round(total("cached_tokens") / total("input_tokens"), 3) if total("input_tokens") else 0.0,
+        "output_tokens": total("output_tokens"),
+        "input_tokens_per_run": round(total("input_tokens") / runs),
+        "retries": total("retries"),
+        "fallbacks": total("fallbacks"),
+        "handoff_tokens": total("handoff_tokens"),
+        "handoff_tokens_saved": total("handoff_tokens_saved"),
+        "cost_usd": round(total("cost_usd"), 4),
+        "tiers": tiers,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the crews offline against a stub LLM and a local fake Serper.")
+    parser.add_argument("--crews", nargs="+", choices=CREW_KINDS, default=CREW_KINDS, help="Crews to benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per crew at each concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="Concurrent runs to measure throughput at")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds each stub LLM call takes on the strong tier")
+    parser.add_argument("--fast-llm-latency", type=float, default=0.08, help="Seconds each stub LLM call takes on the fast tier")
+    parser.add_argument("--fast-low-quality-rate", type=float, default=0.0,
+                        help="Share of fast-tier answers that come back unusable, to exercise the fallback to the strong tier")
+    parser.add_argument("--llm-output-tokens", type=int, default=300, help="Approximate tokens in each stub final answer")
+    parser.add_argument("--llm-repeat-rate", type=float, default=0.2,
+                        help="Share of stub answer bullets that restate facts other stages also report")
+    parser.add_argument("--tool-calls-per-task", type=int, default=1, help="Searches a tool-using agent makes before answering")
+    parser.add_argument("--search-latency", type=float, default=0.05, help="Seconds each fake Serper request takes")
+    parser.add_argument("--out", default="benchmark.json", help="Where to write the machine-readable results")
+    args = parser.parse_args(argv)
+
+    with FakeSerperServer(latency=args.search_latency) as serper:
+        # Point every search path at the fake and keep caches and metrics out of the real .cache
+        # directory; these must be set before the app modules are imported
+        os.environ["SERPER_URL"] = serper.url
+        os.environ["NO_PROXY"] = ",".join(filter(None, [os.environ.get("NO_PROXY"), "127.0.0.1"]))
+        os.environ["SERPER_API_KEY"] = "benchmark"
+        os.environ["MEETING_AGENT_CACHE_DIR"] = tempfile.mkdtemp(prefix="meeting-agent-bench-")
+        os.environ["METRICS_PATH"] = ""
+        import crews
+        import rate_limit
+
+        rate_limit.configure(llm_per_minute=0, search_per_minute=0)
+        tier_settings = {
+            "strong": (args.llm_latency, 0.0),
+            "fast": (args.fast_llm_latency, args.fast_low_quality_rate),
+        }
+        llms = {}
+        for tier, model in crews.MODEL_TIERS.items():
+            latency, low_quality_rate = tier_settings[tier]
+            llms[tier] = make_stub_llm(
+                model, latency, args.llm_output_tokens, args.tool_calls_per_task, low_quality_rate, args.llm_repeat_rate,
+            )
+        search_tool = crews.make_search_tool()
+
+        results = []
+        offset = 0
+        for kind in args.crews:
+            for concurrency in args.concurrency:
+                results.append(bench_crew(kind, args.runs, max(1, concurrency), llms, search_tool, crews, offset))
+                offset += args.runs
+
+    report = {
+        "revision": git_revision(),
+        "created_at": time.time(),
+        "config": {
+            "runs": args.runs,
+            "llm_latency": args.llm_latency,
+            "fast_llm_latency": args.fast_llm_latency,
+            "fast_low_quality_rate": args.fast_low_quality_rate,
+            "routing": {agent: crews.agent_model(agent) for agent in crews.AGENT_TIERS},
+            "llm_output_tokens": args.llm_output_tokens,
+            "llm_repeat_rate": args.llm_repeat_rate,
+            "handoff_budgets": crews.HANDOFF_BUDGETS,
+            "tool_calls_per_task": args.tool_calls_per_task,
+            "search_latency": args.search_latency,
+        },
+        "fake_serper_requests": serper.requests,
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'crew':13} {'conc':>4} {'p50':>7} {'p95':>7} {'runs/min':>9} {'llm':>5} {'tools':>5} {'search':>6} {'in tok/run':>10} {'cached':>6} {'fallback':>8} {'handoff':>8} {'trimmed':>8}")
+    for result in results:
+        latency = result["latency_seconds"]
+        print(
+            f"{result['kind']:13} {result['concurrency']:>4} {latency['p50']:>7.2f} {latency['p95']:>7.2f} "
+            f"{result['throughput_runs_per_minute']:>9.1f} {result['llm_calls']:>5} {result['tool_calls']:>5} "
+            f"{result['search_calls']:>6} {result['input_tokens_per_run']:>10} {result['cached_token_ratio']:>6.0%} {result['fallbacks']:>8} "
+            f"{result['handoff_tokens']:>8} {result['handoff_tokens_saved']:>8}"
+        )
+    print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
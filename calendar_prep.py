@@ -0,0 +1,436 @@
+"""Pre-generate meeting briefs off-peak from an ICS calendar export, without the Streamlit UI.
+
+Example:
+    python calendar_prep.py calendar.ics --internal-domain acme.com --your-company-name Acme --watch
+
+Upcoming meetings with people outside the internal domains are mapped to the Meeting
+Preparation fields and prepared during the off-peak window (server local time) with a
+bounded worker pool and the provider rate limits. Briefs go into the result cache, and the
+app lists them under "Prepared briefs" so they open instantly before the meeting.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import requests
+
+import rate_limit
+from batch_prep import parse_perspective, to_inputs
+from crews import make_llms, make_search_tool, result_key, run_cached
+from meeting_inputs import SELLER_PERSPECTIVE
+from result_cache import get_result_cache
+
+OFF_PEAK_WINDOW = os.environ.get("OFF_PEAK_WINDOW", "22:00-06:00")
+# Personal mailboxes say nothing about which company an attendee is from
+FREE_MAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "outlook.com", "hotmail.com", "live.com", "yahoo.com",
+    "icloud.com", "me.com", "aol.com", "proton.me", "protonmail.com",
+}
+# Second-level labels dropped before the company label: globex.co.uk -> globex
+GENERIC_LABELS = {"com", "org", "net", "co", "ac", "gov", "edu", "biz", "info", "ltd", "plc"}
+SUMMARY_COMPANY_RE = re.compile(r"\b(?:with|w/)\s+(.+)$", re.IGNORECASE)
+SUMMARY_PAIR_RE = re.compile(r"^(.+?)\s*(?:<>|<->|\|| x | / )\s*(.+?)$", re.IGNORECASE)
+SUMMARY_SUFFIX_RE = re.compile(r"(?:\s*[:|,]|\s+[-(\[]).*$")
+# Legal-form words that say nothing about which company a name refers to
+COMPANY_SUFFIXES = {"inc", "corp", "corporation", "co", "company", "ltd", "llc", "plc", "gmbh", "ag", "sa", "group", "the", "and"}
+# Trailing words that name the meeting rather than the company: "Umbrella sync" -> Umbrella
+MEETING_WORDS = {"sync", "call", "meeting", "intro", "introduction", "catch-up", "catchup", "review", "demo", "kickoff", "qbr", "check-in", "follow-up"}
+# Invite boilerplate that isn't worth handing to the agents as focus areas
+CONFERENCING_RE = re.compile(r"https?://|zoom|teams|webex|meet\.google|meeting id|passcode|dial[- ]in|join ", re.IGNORECASE)
+MAX_FOCUS_CHARS = 300
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+MAX_OCCURRENCES = 5000
+
+
+def read_calendar(source):
+    if source.startswith(("http://", "https://", "webcal://")):
+        response = requests.get(source.replace("webcal://", "https://", 1), timeout=30)
+        response.raise_for_status()
+        return response.text
+    with open(source, encoding="utf-8") as f:
+        return f.read()
+
+
+def unfold(text):
+    # RFC 5545 folds long lines by starting the continuation with a space or tab
+    lines = []
+    for line in text.replace("\r\n", "\n").split("\n"):
+        if line[:1] in (" ", "\t") and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+    return lines
+
+
+def parse_property(line):
+    # NAME;PARAM=value;PARAM="quoted:value":VALUE -> (NAME, {PARAM: value}, VALUE)
+    quoted = False
+    for index, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ":" and not quoted:
+            head, value = line[:index], line[index + 1:]
+            break
+    else:
+        return None
+    name, *params = re.split(r';(?=[A-Za-z-]+=)', head)
+    return name.upper(), {k.upper(): v.strip('"') for k, _, v in (p.partition("=") for p in params)}, value
+
+
+def unescape(value):
+    return re.sub(r"\\([nN,;\\])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def parse_datetime(value, params, default_tz):
+    # Returns an aware datetime, or a date for all-day values
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d").date()
+    if value.endswith("Z"):
+        return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+    tz = default_tz
+    if "TZID" in params:
+        try:
+            tz = ZoneInfo(params["TZID"])
+        except (ZoneInfoNotFoundError, ValueError):
+            # Outlook exports Windows zone names; fall back to the server's zone
+            pass
+    return datetime.strptime(value, "%Y%m%dT%H%M%S").replace(tzinfo=tz)
+
+
+def parse_duration(value):
+    match = re.fullmatch(r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?", value.strip())
+    if not match:
+        return None
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0)
+    )
+    return -duration if sign == "-" else duration
+
+
+def parse_events(text, default_tz=None):
+    default_tz = default_tz or datetime.now().astimezone().tzinfo
+    events, event = [], None
+    for line in unfold(text):
+        prop = parse_property(line)
+        if prop is None:
+            continue
+        name, params, value = prop
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event = {"attendees": [], "exdates": set(), "status": "", "summary": "", "description": "", "uid": "", "rrule": ""}
+        elif name == "END" and value.upper() == "VEVENT" and event is not None:
+            if "start" in event:
+                if "end" not in event:
+                    event["end"] = event["start"] + event.pop("duration", timedelta(hours=1))
+                events.append(event)
+            event = None
+        elif event is None:
+            continue
+        elif name in ("DTSTART", "DTEND", "RECURRENCE-ID"):
+            event[{"DTSTART": "start", "DTEND": "end", "RECURRENCE-ID": "recurrence_id"}[name]] = parse_datetime(value, params, default_tz)
+        elif name == "DURATION":
+            event["duration"] = parse_duration(value) or timedelta(hours=1)
+        elif name == "EXDATE":
+            event["exdates"].update(parse_datetime(part, params, default_tz) for part in value.split(","))
+        elif name in ("ATTENDEE", "ORGANIZER"):
+            email = re.sub(r"(?i)^mailto:", "", value).strip().lower()
+            person = {"name": unescape(params.get("CN", "")).strip(), "email": email, "partstat": params.get("PARTSTAT", "").upper()}
+            if name == "ORGANIZER":
+                event["organizer"] = person
+            else:
+                event["attendees"].append(person)
+        elif name in ("SUMMARY", "DESCRIPTION", "UID", "STATUS", "RRULE"):
+            event[name.lower()] = unescape(value).strip()
+    return events
+
+
+def occurrences(event, start, end):
+    # Start times of an event within [start, end). DAILY and WEEKLY rules (INTERVAL, COUNT,
+    # UNTIL, BYDAY) are expanded; other recurrences only yield their first occurrence
+    first = event["start"]
+    rule = dict(part.partition("=")[::2] for part in event["rrule"].upper().split(";") if part)
+    if rule.get("FREQ") not in ("DAILY", "WEEKLY"):
+        return [first] if start <= first < end else []
+    interval = int(rule.get("INTERVAL") or 1)
+    count = int(rule["COUNT"]) if rule.get("COUNT") else None
+    until = parse_datetime(rule["UNTIL"], {}, first.tzinfo) if rule.get("UNTIL") else None
+    if isinstance(until, date) and not isinstance(until, datetime):
+        until = datetime.combine(until, datetime.max.time(), first.tzinfo)
+    if rule["FREQ"] == "DAILY":
+        offsets = [timedelta(days=interval * n) for n in range(MAX_OCCURRENCES)]
+    else:
+        days = [WEEKDAYS.index(day[-2:]) for day in rule.get("BYDAY", "").split(",") if day[-2:] in WEEKDAYS] or [first.weekday()]
+        week_start = first - timedelta(days=first.weekday())
+        offsets = [
+            week_start - first + timedelta(weeks=interval * n, days=day)
+            for n in range(MAX_OCCURRENCES // 7) for day in sorted(days)
+        ]
+    found, seen = [], 0
+    for offset in offsets:
+        when = first + offset
+        if when < first:
+            continue
+        if (until is not None and when > until) or when >= end or (count is not None and seen >= count):
+            break
+        seen += 1
+        if when >= start and when not in event["exdates"]:
+            found.append(when)
+    return found
+
+
+def company_from_domain(domain):
+    labels = domain.lower().split(".")
+    while len(labels) > 1 and (labels[-1] in GENERIC_LABELS or len(labels[-1]) == 2):
+        labels.pop()
+    return labels[-1].replace("-", " ").replace("_", " ").title()
+
+
+def name_words(name):
+    # Distinctive words of a company name, for telling "Acme Inc" and "Acme" apart from "Globex Inc"
+    return set(re.findall(r"[a-z0-9]+", name.lower())) - COMPANY_SUFFIXES
+
+
+def clean_company(text):
+    words = SUMMARY_SUFFIX_RE.sub("", text).split()
+    while len(words) > 1 and words[-1].lower() in MEETING_WORDS:
+        words.pop()
+    return " ".join(words)
+
+
+def company_from_summary(summary, your_company_name):
+    # Any side sharing a word with our own name is us ("Acme <> Initech" for "Acme Inc")
+    ours = name_words(your_company_name or "")
+    match = SUMMARY_COMPANY_RE.search(summary)
+    if match:
+        sides = [clean_company(match.group(1))]
+    else:
+        match = SUMMARY_PAIR_RE.match(summary)
+        sides = [clean_company(side) for side in match.groups()] if match else []
+    others = [side for side in sides if side and not name_words(side) & ours]
+    return others[0] if others else ""
+
+
+def focus_from_description(description):
+    lines = [line.strip() for line in description.splitlines() if line.strip() and not CONFERENCING_RE.search(line)]
+    focus = " ".join(lines)
+    return focus if len(focus) <= MAX_FOCUS_CHARS else focus[:MAX_FOCUS_CHARS].rsplit(" ", 1)[0]
+
+
+def event_spec(event, internal_domains, your_company_name=""):
+    # Maps a calendar event to Meeting Preparation fields; returns (spec, None) or (None, reason)
+    if event["status"].upper() == "CANCELLED":
+        return None, "cancelled"
+    organizer = event.get("organizer") or {}
+    people = [person for person in event["attendees"] + [organizer] if person.get("email")]
+    domains = set(internal_domains)
+    if not domains and your_company_name:
+        # Without --internal-domain, ours are the domains that spell our company name.
+        # The organizer is no guide: clients send invites too
+        ours = name_words(your_company_name)
+        domains = {
+            domain for domain in (person["email"].rpartition("@")[2] for person in people)
+            if domain not in FREE_MAIL_DOMAINS and name_words(company_from_domain(domain)) & ours
+        }
+    if not domains:
+        return None, "ambiguous (no attendee from our domain)"
+    external = [person for person in people if person["email"].rpartition("@")[2] not in domains]
+    if not external:
+        return None, "no external attendees"
+    company_domains = [
+        person["email"].rpartition("@")[2] for person in external
+        if person["email"].rpartition("@")[2] not in FREE_MAIL_DOMAINS
+    ]
+    # The invite title usually has the proper name ("Globex Corporation"), but "Lunch with John"
+    # doesn't; trust it when it agrees with the attendees' domain. With only personal mailboxes
+    # to go on, a name made up of a guest's own names isn't a company either
+    company_name = company_from_summary(event["summary"], your_company_name)
+    if company_domains:
+        from_domain = company_from_domain(max(set(company_domains), key=company_domains.count))
+        if not name_words(from_domain) & name_words(company_name):
+            company_name = from_domain
+    elif company_name:
+        guests = set().union(*(name_words(f"{person['name']} {person['email'].partition('@')[0]}") for person in external))
+        if name_words(company_name) <= guests:
+            company_name = ""
+    if not company_name:
+        return None, "no client company found"
+
+    attendees, listed = [], set()
+    for person in external + [person for person in people if person not in external]:
+        if person["email"] in listed or person["partstat"] == "DECLINED":
+            continue
+        listed.add(person["email"])
+        side = company_name if person in external else "our team"
+        attendees.append(f"{person['name'] or person['email']} ({side})")
+    minutes = (event["end"] - event["start"]).total_seconds() / 60
+    return {
+        "company_name": company_name,
+        "meeting_objective": event["summary"],
+        "attendees": "\n".join(attendees),
+        # Same bounds and step as the duration field in the app
+        "meeting_duration": int(min(180, max(15, round(minutes / 15) * 15))),
+        "focus_areas": focus_from_description(event["description"]),
+    }, None
+
+
+def upcoming_meetings(events, now, lookahead):
+    # (uid, start, event) for every occurrence starting within the lookahead, soonest first.
+    # Moved or edited occurrences of a recurring series replace the series' own instance
+    overrides = {(event["uid"], event["recurrence_id"]) for event in events if "recurrence_id" in event}
+    meetings = []
+    for event in events:
+        if not isinstance(event["start"], datetime):
+            # All-day entries are holidays and out-of-office blocks, not meetings
+            continue
+        length = event["end"] - event["start"]
+        for start in occurrences(event, now, now + lookahead):
+            if "recurrence_id" not in event and (event["uid"], start) in overrides:
+                continue
+            meetings.append((f"{event['uid']}@{start.isoformat()}", start, dict(event, start=start, end=start + length)))
+    return sorted(meetings, key=lambda meeting: meeting[1])
+
+
+def parse_window(text):
+    # "22:00-06:00" -> (1320, 360) minutes after midnight; the window may wrap past midnight
+    match = re.fullmatch(r"(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})", text.strip())
+    if not match:
+        raise ValueError(f"Bad off-peak window '{text}', expected HH:MM-HH:MM")
+    start_h, start_m, end_h, end_m = map(int, match.groups())
+    return start_h * 60 + start_m, end_h * 60 + end_m
+
+
+def seconds_until_window(now, window):
+    # 0 while inside the window
+    if window is None:
+        return 0
+    start, end = window
+    minute = now.hour * 60 + now.minute
+    inside = start <= minute < end if start < end else (minute >= start or minute < end)
+    if inside:
+        return 0
+    wait = (start - minute) % (24 * 60)
+    return wait * 60 - now.second
+
+
+def prepare_meeting(uid, start, spec, defaults, llms, search_tool, window, refresh):
+    cache = get_result_cache()
+    record = {"uid": uid, "start": start.isoformat(), "company_name": spec["company_name"], "status": "failed"}
+    started = time.time()
+    key = ""
+    try:
+        inputs = to_inputs(spec, defaults)
+        key = result_key("meeting_prep", inputs)
+        if not refresh and cache.get(key) is not None:
+            record["status"] = "ready"
+        elif seconds_until_window(datetime.now(), window):
+            # Queued work that didn't start before the window closed waits for the next one
+            record["status"] = "deferred"
+        else:
+            entry = run_cached("meeting_prep", inputs, llms, search_tool, refresh=refresh)
+            record["status"] = "prepared"
+            if entry.get("metrics") and not entry.get("coalesced"):
+                record["metrics"] = entry["metrics"]["totals"]
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.time() - started, 2)
+    if key:
+        status = "ready" if record["status"] in ("ready", "prepared") else record["status"]
+        label = f"{spec['company_name']}: {spec['meeting_objective']}" if spec["meeting_objective"] else spec["company_name"]
+        cache.set_scheduled(uid, start.timestamp(), label, key, status, record.get("error", ""))
+    return record
+
+
+def run_pass(args, defaults, llms, search_tool, window):
+    now = datetime.now().astimezone()
+    events = parse_events(read_calendar(args.calendar))
+    jobs, skipped = [], {}
+    for uid, start, event in upcoming_meetings(events, now, timedelta(hours=args.lookahead_hours)):
+        spec, reason = event_spec(event, args.internal_domain, defaults["your_company_name"])
+        if spec is None:
+            skipped[reason] = skipped.get(reason, 0) + 1
+        else:
+            jobs.append((uid, start, spec))
+    print(
+        f"{now:%Y-%m-%d %H:%M} {len(jobs)} meetings to prepare in the next {args.lookahead_hours}h"
+        + "".join(f", {count} skipped ({reason})" for reason, count in sorted(skipped.items())),
+        flush=True,
+    )
+
+    records = []
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = [
+            pool.submit(prepare_meeting, uid, start, spec, defaults, llms, search_tool, window, args.refresh)
+            for uid, start, spec in jobs
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            print(
+                f"[{len(records)}/{len(jobs)}] {record['status']:8} {record['seconds']:7.1f}s  {record['start'][:16]}  "
+                f"{record['company_name']}  {record.get('error', '')}",
+                flush=True,
+            )
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate meeting briefs off-peak from an ICS calendar export.")
+    parser.add_argument("calendar", help="Path or http(s)/webcal URL of an .ics calendar export")
+    parser.add_argument("--internal-domain", action="append", default=[],
+                        help="Email domain of your own company (repeatable); defaults to domains matching --your-company-name")
+    parser.add_argument("--window", default=OFF_PEAK_WINDOW, help="Off-peak hours to run in, server local time (default: %(default)s)")
+    parser.add_argument("--now", action="store_true", help="Ignore the off-peak window and start immediately")
+    parser.add_argument("--lookahead-hours", type=int, default=36, help="Prepare meetings starting within this many hours")
+    parser.add_argument("--watch", action="store_true", help="Keep running: re-read the calendar every --interval minutes in the window")
+    parser.add_argument("--interval", type=int, default=30, help="Minutes between passes with --watch")
+    parser.add_argument("--concurrency", type=int, default=2, help="Meetings prepared at the same time")
+    parser.add_argument("--llm-rpm", type=float, default=None, help="Global cap on LLM calls per minute (default: LLM_CALLS_PER_MINUTE or unlimited)")
+    parser.add_argument("--search-rpm", type=float, default=None, help="Global cap on Serper calls per minute (default: SEARCH_CALLS_PER_MINUTE or unlimited)")
+    parser.add_argument("--perspective", default="seller", help="Perspective for every meeting: seller or buyer")
+    parser.add_argument("--your-company-name", default="", help="your_company_name for every meeting")
+    parser.add_argument("--your-company-description", default="", help="your_company_description for every meeting")
+    parser.add_argument("--refresh", action="store_true", help="Prepare briefs again even if one is cached")
+    args = parser.parse_args(argv)
+
+    anthropic_api_key = os.environ.get("ANTHROPIC_API_KEY", "").strip()
+    if not anthropic_api_key or not os.environ.get("SERPER_API_KEY", "").strip():
+        parser.error("ANTHROPIC_API_KEY and SERPER_API_KEY must be set in the environment")
+    if not args.internal_domain and not args.your_company_name:
+        parser.error("pass --internal-domain or --your-company-name so your own attendees can be told apart")
+    try:
+        window = None if args.now else parse_window(args.window)
+        perspective = parse_perspective(args.perspective, SELLER_PERSPECTIVE)
+    except ValueError as e:
+        parser.error(str(e))
+
+    rate_limit.configure(llm_per_minute=args.llm_rpm, search_per_minute=args.search_rpm)
+    defaults = {
+        "your_company_name": args.your_company_name,
+        "your_company_description": args.your_company_description,
+        "meeting_perspective": perspective,
+    }
+    llms = make_llms(anthropic_api_key)
+    search_tool = make_search_tool()
+
+    failures = 0
+    while True:
+        wait = seconds_until_window(datetime.now(), window)
+        if wait:
+            print(f"Waiting {wait / 3600:.1f}h for the off-peak window {args.window}", flush=True)
+            time.sleep(wait)
+        records = run_pass(args, defaults, llms, search_tool, window)
+        failures = sum(record["status"] == "failed" for record in records)
+        if not args.watch:
+            break
+        time.sleep(args.interval * 60)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,722 @@
+import contextvars
+import inspect
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Disable CrewAI telemetry and tracing to prevent UnicodeEncodeError in headers.
+# Set before crewai is imported so it takes effect for every entry point (UI and CLI).
+os.environ["OTEL_SDK_DISABLED"] = "true"
+os.environ["CREWAI_TELEMETRY_OPT_OUT"] = "true"
+os.environ["CREWAI_TELEMETRY_RECORD"] = "false"
+os.environ["OTEL_PYTHON_ID_GENERATOR"] = "random"
+
+from crewai import Agent, Task, Crew, LLM
+from crewai.events import (
+    AgentExecutionErrorEvent, LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent, ToolUsageErrorEvent, ToolUsageFinishedEvent,
+    crewai_event_bus,
+)
+from crewai.hooks import register_before_llm_call_hook
+from crewai.hooks.dispatch import HookAborted
+from crewai.llms.cache import mark_cache_breakpoint
+from crewai.process import Process
+from crewai.tasks.task_output import TaskOutput
+from crewai_tools import SerperDevTool
+
+import handoff
+from harvester import (
+    FEED_SIZE, INDIA_CITY_VARIANTS, INSTAGRAM_VARIANTS, LINKEDIN_VARIANTS, SearchFailed,
+    canonicalize_instagram, canonicalize_linkedin, expand_queries, format_feed, format_pool, harvest,
+)
+from insta_analytics import format_stats, instagram_stats
+from jobs import JobCancelled, current_job
+import metrics
+from rate_limit import llm_limiter, search_limiter
+from result_cache import get_result_cache, template_hash
+from search_cache import SERPER_URL, get_search_cache
+from single_flight import get_single_flight
+
+logger = logging.getLogger(__name__)
+
+# Model tiers: cheap, mechanical stages run on the fast model and fall back to the strong
+# one when a run fails or comes back unusable. Agents pick a tier in AGENT_DEFINITIONS;
+# MODEL_ROUTING="context_analyzer=strong,insta_scout=fast" overrides it per agent.
+MODEL_TIERS = {
+    "strong": os.environ.get("MODEL_STRONG", "anthropic/claude-sonnet-4-20250514"),
+    "fast": os.environ.get("MODEL_FAST", "anthropic/claude-haiku-4-5-20251001"),
+}
+FALLBACK_TIER = "strong"
+
+# Outputs shorter than this, without any markdown heading, or that are a refusal or an
+# iteration-limit bailout count as low quality and are rerun on the fallback tier
+MIN_OUTPUT_CHARS = 400
+LOW_QUALITY_MARKERS = ("agent stopped due to iteration limit", "i cannot", "i can't", "i'm unable", "i am unable", "sorry")
+
+# CrewAI retries a task when the step callback raises, but passes HookAborted straight
+# through, so a cancelled job is stopped here before its next LLM request is sent
+class CallCancelled(HookAborted, JobCancelled):
+    pass
+
+def _abort_cancelled_call(context):
+    job = current_job()
+    if job is not None and job.cancel_requested:
+        raise CallCancelled("job cancelled", source="job_runner")
+
+register_before_llm_call_hook(_abort_cancelled_call)
+
+# Every agent LLM call passes through CrewAI's global hook, so one limiter caps
+# provider requests across all concurrent crews in the process
+def _throttle_llm_call(context):
+    metrics.record(rate_limit_wait_seconds=llm_limiter.acquire())
+
+register_before_llm_call_hook(_throttle_llm_call)
+
+# CrewAI sends each agent's persona as the system prompt, ahead of the task, so the four
+# meeting-prep stages never share a prompt prefix. Hoist the task's stable blocks (the
+# shared context and earlier stage outputs) in front of the persona as separate user
+# messages with cache breakpoints, so later stages and reruns read them from the provider's
+# prompt cache. Runs once per agent loop: afterwards there is no system message left.
+SHARED_BLOCK_END = re.compile(r"(?<=</shared_context>\n\n)|(?<=</earlier_stage>\n\n)")
+
+def _cache_shared_context(context):
+    messages = context.messages
+    if len(messages) < 2 or messages[0].get("role") != "system" or messages[1].get("role") != "user":
+        return
+    content = messages[1].get("content")
+    if not isinstance(content, str) or "<shared_context>" not in content:
+        return
+    *blocks, task = SHARED_BLOCK_END.split(content)
+    lead, first = blocks[0].split("<shared_context>", 1)
+    blocks[0] = f"<shared_context>{first}"
+    hoisted = [{"role": "user", "content": block} for block in blocks]
+    # Breakpoints after the shared context and after the last earlier output (a later
+    # stage finds the shorter prefix by lookback), plus the task itself for the agent loop
+    hoisted[0] = mark_cache_breakpoint(hoisted[0])
+    hoisted[-1] = mark_cache_breakpoint(hoisted[-1])
+    hoisted.append(mark_cache_breakpoint({"role": "user", "content": f"{messages[0]['content']}\n{lead}{task}"}))
+    messages[:2] = hoisted
+
+register_before_llm_call_hook(_cache_shared_context)
+
+# CrewAI's event bus runs handlers in a copy of the emitting thread's context,
+# so LLM and tool events land on the run/stage that triggered them
+@crewai_event_bus.on(LLMCallStartedEvent)
+def _on_llm_call_started(source, event):
+    metrics.llm_call_started(event.call_id, event.timestamp)
+
+@crewai_event_bus.on(LLMCallCompletedEvent)
+def _on_llm_call_completed(source, event):
+    metrics.llm_call_finished(event.call_id, event.timestamp, event.model, event.usage)
+
+@crewai_event_bus.on(LLMCallFailedEvent)
+def _on_llm_call_failed(source, event):
+    metrics.llm_call_finished(event.call_id, event.timestamp, event.model, None, failed=True)
+
+@crewai_event_bus.on(ToolUsageFinishedEvent)
+@crewai_event_bus.on(ToolUsageErrorEvent)
+def _on_tool_used(source, event):
+    metrics.record(tool_calls=1)
+
+# Emitted for every failed attempt at a task; CrewAI restarts the task from scratch up to
+# the agent's max_retry_limit, so each one is a retry (the last of a task that gives up too)
+@crewai_event_bus.on(AgentExecutionErrorEvent)
+def _on_agent_error(source, event):
+    metrics.record(retries=1)
+
+# Agent definitions don't depend on user input, so they live here once instead of
+# being rebuilt on every rerun. Agent objects themselves are created per kickoff
+# because CrewAI attaches run state (crew, executor) to them.
+AGENT_DEFINITIONS = {
+    "context_analyzer": {
+        "role": 'Meeting Context Specialist',
+        "goal": 'Analyze and summarize key background information for the meeting',
+        "backstory": 'You are an expert at quickly understanding complex business contexts and identifying critical information.',
+        "uses_search": True,
+        "tier": "fast",
+    },
+    "industry_insights_generator": {
+        "role": 'Industry Expert',
+        "goal": 'Provide in-depth industry analysis and identify key trends',
+        "backstory": 'You are a seasoned industry analyst with a knack for spotting emerging trends and opportunities.',
+        "uses_search": True,
+        "tier": "fast",
+    },
+    "strategy_formulator": {
+        "role": 'Meeting Strategist',
+        "goal": 'Develop a tailored meeting strategy and detailed agenda',
+        "backstory": 'You are a master meeting planner, known for creating highly effective strategies and agendas.',
+        "uses_search": False,
+        "tier": "strong",
+    },
+    "executive_briefing_creator": {
+        "role": 'Communication Specialist',
+        "goal": 'Synthesize information into concise and impactful briefings',
+        "backstory": 'You are an expert communicator, skilled at distilling complex information into clear, actionable insights.',
+        "uses_search": False,
+        "tier": "strong",
+    },
+    "discovery_scout": {
+        "role": 'Social Intelligence Scout',
+        "goal": 'Discover and synthesize trending ideas, corporate stances, and employee discussions from LinkedIn with specific attention to URLs and regional nuances',
+        "backstory": 'You are an expert at digital forensic search and trend analysis. You are particularly skilled at finding direct source links and identifying regional differences in how topics are discussed across the globe.',
+        "uses_search": False,
+        "tier": "fast",
+    },
+    "insta_scout": {
+        "role": 'Visual Trend Analyst',
+        "goal": 'Extract viral hashtags, aesthetic patterns, and high-engagement content from Instagram search results',
+        "backstory": 'You are a creative strategist who lives on social media. You have a "photographic memory" for hashtags and can instantly spot the common visual vibe across dozens of posts.',
+        "uses_search": False,
+        "tier": "fast",
+    },
+}
+
+def parse_routing(text):
+    routing = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        agent, _, tier = (part.strip() for part in item.partition("="))
+        if agent not in AGENT_DEFINITIONS or tier not in MODEL_TIERS:
+            raise ValueError(f"Bad MODEL_ROUTING entry '{item}': expected <agent>=<{'|'.join(MODEL_TIERS)}>")
+        routing[agent] = tier
+    return routing
+
+AGENT_TIERS = {
+    **{name: definition["tier"] for name, definition in AGENT_DEFINITIONS.items()},
+    **parse_routing(os.environ.get("MODEL_ROUTING")),
+}
+
+def agent_model(name):
+    return MODEL_TIERS[AGENT_TIERS[name]]
+
+def model_tier(model):
+    # LLM events report the model without the provider prefix
+    name = (model or "").split("/")[-1]
+    for tier, tier_model in MODEL_TIERS.items():
+        if tier_model.split("/")[-1] == name:
+            return tier
+    return ""
+
+def output_problem(output):
+    text = (output or "").strip()
+    if len(text) < MIN_OUTPUT_CHARS:
+        return f"output too short ({len(text)} chars)"
+    if text.lower().startswith(LOW_QUALITY_MARKERS):
+        return "output is a refusal or an aborted run"
+    if "#" not in text:
+        return "output has no markdown headings"
+    return None
+
+def kickoff_routed(agent_name, build_crew, llms, task_callback=None):
+    """Run ``build_crew(llm, task_callback)`` on the agent's tier, rerunning once on the fallback tier if it fails or looks unusable.
+
+    Task outputs are held back until an attempt is accepted, so a rejected attempt's tasks are
+    never reported as completed and a fallback doesn't report them twice.
+    """
+    def attempt(tier):
+        task_outputs = []
+        result = build_crew(llms[tier], task_outputs.append).kickoff()
+        return result, task_outputs
+
+    tier = AGENT_TIERS[agent_name]
+    try:
+        result, task_outputs = attempt(tier)
+        problem = output_problem(result.raw)
+    except JobCancelled:
+        raise
+    except Exception as e:
+        if tier == FALLBACK_TIER:
+            raise
+        problem = f"{type(e).__name__}: {e}"
+    if problem is not None and tier != FALLBACK_TIER:
+        logger.warning("%s on the %s tier: %s; rerunning on %s", agent_name, tier, problem, FALLBACK_TIER)
+        metrics.record(fallbacks=1)
+        result, task_outputs = attempt(FALLBACK_TIER)
+    if task_callback:
+        for task_output in task_outputs:
+            task_callback(task_output)
+    return result
+
+def build_agent(name, llm, search_tool):
+    definition = AGENT_DEFINITIONS[name]
+    return Agent(
+        role=definition["role"],
+        goal=definition["goal"],
+        backstory=definition["backstory"],
+        verbose=True,
+        allow_delegation=False,
+        llm=llm,
+        tools=[search_tool] if definition["uses_search"] else []
+    )
+
+def perspective_context(your_company_name, your_company_description, meeting_perspective, company_name):
+    # Shared by all four stages and sent ahead of the stage instructions, so it must not
+    # depend on anything but these four fields
+    if "Provider/Seller" in meeting_perspective:
+        return f"""
+        CRITICAL CONTEXT: You are preparing for a meeting where YOUR COMPANY ({your_company_name}) is the PROVIDER/SELLER.
+        Your company offers: {your_company_description}
+
+        Your goal is to:
+        1. Identify gaps or pain points at {company_name} that YOUR company can solve
+        2. Position YOUR capabilities as solutions to THEIR challenges
+        3. Prepare responses that showcase YOUR value proposition
+        4. Anticipate objections they might have about price, quality, or capabilities
+        5. Build a persuasive narrative for why they should choose YOU
+
+        YOUR COMPANY CONTEXT:
+        - Company Name: {your_company_name}
+        - What We Do: {your_company_description}
+        - Our Role: PROVIDER/SELLER - We are offering/selling services to {company_name}
+        """
+    return f"""
+        CRITICAL CONTEXT: You are preparing for a meeting where YOUR COMPANY ({your_company_name}) is the CUSTOMER/BUYER.
+        Your company needs: {your_company_description}
+
+        Your goal is to:
+        1. Evaluate if {company_name} can reliably meet YOUR requirements
+        2. Identify potential risks, quality issues, or red flags
+        3. Prepare tough questions to vet THEIR capabilities
+        4. Understand negotiation leverage points for pricing and terms
+        5. Build criteria to determine if THEY are the right partner for YOU
+
+        YOUR COMPANY CONTEXT:
+        - Company Name: {your_company_name}
+        - What We Do: {your_company_description}
+        - Our Role: CUSTOMER/BUYER - We are evaluating/buying services from {company_name}
+        """
+
+# Stage prompts: only the stage-specific instructions; the perspective context and the
+# upstream outputs are prepended by build_stage_crew. Each function's parameters are the
+# form fields that stage reads (the four perspective fields always, since every stage gets
+# that context), and only those fields plus upstream outputs key its cached output, so
+# editing e.g. the meeting duration reuses the company and industry research.
+def context_analysis_prompt(your_company_name, your_company_description, meeting_perspective, company_name, meeting_objective, attendees):
+    return f"""
+        Analyze the context for the meeting with {company_name}, considering:
+        1. The meeting objective: {meeting_objective}
+        2. The attendees: {attendees}
+
+        Research {company_name} thoroughly, including:
+        1. Recent news and press releases
+        2. Key products or services
+        3. Major competitors
+        4. Financial stability and market position
+
+        CRITICAL: Frame all findings in terms of how they relate to OUR position. If we are the seller, identify their pain points. If we are the buyer, identify their reliability indicators.
+
+        Provide a comprehensive summary of your findings, highlighting the most relevant information for the meeting context.
+        Format your output using markdown with appropriate headings and subheadings.
+        """, "A detailed analysis of the meeting context and company background, including recent developments, financial performance, and relevance to the meeting objective from YOUR company's perspective, formatted in markdown with headings and subheadings."
+
+def industry_analysis_prompt(your_company_name, your_company_description, meeting_perspective, company_name, meeting_objective):
+    return f"""
+        For the industry {company_name} operates in and the meeting objective: {meeting_objective}, provide an in-depth industry analysis:
+        1. Identify key trends and developments in the industry
+        2. Analyze the competitive landscape
+        3. Highlight potential opportunities and threats
+        4. Provide insights on market positioning
+
+        CRITICAL: If we are the SELLER, identify market gaps where OUR solution fits. If we are the BUYER, identify market risks or better alternatives we should consider.
+
+        Ensure the analysis is relevant to the meeting objective.
+        Format your output using markdown with appropriate headings and subheadings.
+        """, "A comprehensive industry analysis report from YOUR company's perspective, including trends, competitive landscape, opportunities, threats, and strategic positioning for YOUR role in the partnership, formatted in markdown with headings and subheadings."
+
+def strategy_development_prompt(your_company_name, your_company_description, meeting_perspective, company_name, meeting_objective,
+                                meeting_duration, focus_areas):
+    return f"""
+        Using the context analysis and industry insights, develop a tailored meeting strategy and detailed agenda for the {meeting_duration}-minute meeting with {company_name}. Include:
+        1. A time-boxed agenda with clear objectives for each section
+        2. Key talking points for each agenda item
+        3. Suggested speakers or leaders for each section
+        4. Potential discussion topics and questions to drive the conversation
+        5. Strategies to address the specific focus areas and concerns: {focus_areas}
+
+        CRITICAL STRATEGY ALIGNMENT:
+        {"- Focus on building rapport and demonstrating value proposition" if "Provider/Seller" in meeting_perspective else "- Focus on due diligence questions and negotiation leverage"}
+        {"- Allocate time for handling objections and closing" if "Provider/Seller" in meeting_perspective else "- Allocate time for technical vetting and pricing negotiation"}
+        {"- Position YOUR company as the solution to THEIR problems" if "Provider/Seller" in meeting_perspective else "- Position YOUR requirements and ensure THEY can meet YOUR standards"}
+
+        Ensure the strategy and agenda align with the meeting objective: {meeting_objective}
+        Format your output using markdown with appropriate headings and subheadings.
+        """, "A detailed meeting strategy and time-boxed agenda optimized for YOUR role (seller or buyer), including objectives, key talking points, and role-specific strategies, formatted in markdown with headings and subheadings."
+
+def executive_brief_prompt(your_company_name, your_company_description, meeting_perspective, company_name, meeting_objective):
+    return f"""
+        Synthesize all the gathered information into a comprehensive yet concise executive brief for the meeting with {company_name}. Create the following components:
+
+        1. A detailed one-page executive summary including:
+           - Clear statement of the meeting objective
+           - YOUR COMPANY ({your_company_name}) overview and what you bring to the table
+           - THEIR COMPANY ({company_name}) background and key attendees
+           - Critical intelligence about {company_name} and relevant industry context
+           - Top 3-5 strategic goals for the meeting FROM YOUR PERSPECTIVE
+           - Brief overview of the meeting structure and key topics to be covered
+
+        2. An in-depth list of key talking points, each supported by:
+           - Relevant data or statistics
+           - Specific examples or case studies
+           - {"How YOUR capabilities solve THEIR problems" if "Provider/Seller" in meeting_perspective else "How THEIR capabilities meet YOUR requirements"}
+           - {"Value proposition and differentiation from competitors" if "Provider/Seller" in meeting_perspective else "Due diligence points and risk assessment"}
+
+        3. Anticipate and prepare for potential questions:
+           {"- Questions THEY will ask YOU about pricing, capabilities, timeline, and guarantees" if "Provider/Seller" in meeting_perspective else "- Questions YOU should ask THEM about quality, reliability, support, and references"}
+           - Craft thoughtful, data-driven responses to each question
+           - {"Prepare objection handling for common concerns" if "Provider/Seller" in meeting_perspective else "Prepare tough vetting questions with specific metrics"}
+           - Include any supporting information or additional context that might be needed
+
+        4. Strategic recommendations and next steps:
+           - Provide 3-5 actionable recommendations based on the analysis
+           - {"Clear path to closing the deal or securing commitment" if "Provider/Seller" in meeting_perspective else "Clear evaluation criteria and vendor selection process"}
+           - Outline clear next steps for implementation or follow-up
+           - Suggest timelines or deadlines for key actions
+           - Identify potential challenges or roadblocks and propose mitigation strategies
+
+        CRITICAL: The entire brief must be written from the perspective of {your_company_name} meeting with {company_name}.
+        {"All 'we/our' references should be about YOUR company selling TO them." if "Provider/Seller" in meeting_perspective else "All 'we/our' references should be about YOUR company buying FROM them."}
+
+        Ensure the brief is comprehensive yet concise, highly actionable, and precisely aligned with the meeting objective: {meeting_objective}.
+        The document should be structured for easy navigation and quick reference during the meeting.
+        Format your output using markdown with appropriate headings and subheadings.
+        """, "A comprehensive executive brief written from YOUR company's perspective, clearly distinguishing between YOUR role and THEIR role, including summary, key talking points optimized for your position (seller or buyer), Q&A preparation with role-appropriate questions, and strategic recommendations, formatted in markdown with main headings (H1), section headings (H2), and subsection headings (H3) where appropriate. Use bullet points, numbered lists, and emphasis (bold/italic) for key information."
+
+# The meeting-prep pipeline as a DAG: company and industry research only need the form
+# inputs and run concurrently; strategy joins both; the brief builds on all three
+# handoff_tokens bounds how much of a stage's output later stages read (0 = all of it), so the
+# brief's input stays the same size however verbose the research stages are
+MEETING_STAGES = [
+    {"name": "context_analysis", "agent": "context_analyzer", "prompt": context_analysis_prompt, "upstream": [],
+     "handoff_tokens": 1200},
+    {"name": "industry_analysis", "agent": "industry_insights_generator", "prompt": industry_analysis_prompt, "upstream": [],
+     "handoff_tokens": 1200},
+    {"name": "strategy_development", "agent": "strategy_formulator", "prompt": strategy_development_prompt,
+     "upstream": ["context_analysis", "industry_analysis"], "handoff_tokens": 2000},
+    {"name": "executive_brief", "agent": "executive_briefing_creator", "prompt": executive_brief_prompt,
+     "upstream": ["context_analysis", "industry_analysis", "strategy_development"], "handoff_tokens": 0},
+]
+
+def parse_handoff_budgets(text):
+    budgets = {}
+    stage_names = [stage["name"] for stage in MEETING_STAGES]
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        stage, _, tokens = (part.strip() for part in item.partition("="))
+        if stage not in stage_names or not tokens.isdigit():
+            raise ValueError(f"Bad HANDOFF_TOKEN_BUDGETS entry '{item}': expected <stage>=<tokens>")
+        budgets[stage] = int(tokens)
+    return budgets
+
+HANDOFF_BUDGETS = {
+    **{stage["name"]: stage["handoff_tokens"] for stage in MEETING_STAGES},
+    **parse_handoff_budgets(os.environ.get("HANDOFF_TOKEN_BUDGETS")),
+}
+
+PERSPECTIVE_FIELDS = ["your_company_name", "your_company_description", "meeting_perspective", "company_name"]
+
+def stage_inputs(stage):
+    return list(inspect.signature(stage["prompt"]).parameters)
+
+def stage_waves(stages):
+    # Group stages into waves whose upstream stages are all in earlier waves
+    done, waves = set(), []
+    remaining = list(stages)
+    while remaining:
+        wave = [stage for stage in remaining if set(stage["upstream"]) <= done]
+        if not wave:
+            raise ValueError("Meeting stages have a dependency cycle")
+        waves.append(wave)
+        done.update(stage["name"] for stage in wave)
+        remaining = [stage for stage in remaining if stage["name"] not in done]
+    return waves
+
+def build_stage_crew(stage, llm, search_tool, inputs, upstream_outputs, step_callback=None, task_callback=None):
+    agent = build_agent(stage["agent"], llm, search_tool)
+    instructions, expected_output = stage["prompt"](**{name: inputs[name] for name in stage_inputs(stage)})
+    # Stable blocks first, in upstream order, so each stage's prompt starts with the previous
+    # stage's; _cache_shared_context turns them into prompt-cache breakpoints
+    context = perspective_context(*(inputs[name] for name in PERSPECTIVE_FIELDS))
+    blocks = [f"<shared_context>{context}</shared_context>"]
+    blocks += [
+        f'<earlier_stage name="{name}">\n### {name.replace("_", " ").title()}\n{output}\n</earlier_stage>'
+        for name, output in upstream_outputs.items()
+    ]
+    description = "\n\n".join(blocks + [instructions])
+    task = Task(description=description, expected_output=expected_output, agent=agent, name=stage["name"])
+    return Crew(
+        agents=[agent],
+        tasks=[task],
+        verbose=True,
+        process=Process.sequential,
+        step_callback=step_callback,
+        task_callback=task_callback
+    )
+
+def stage_template_hash(stage):
+    # The handoff budgets change what a stage reads, so they version its output like a prompt edit
+    budgets = ",".join(f"{name}={HANDOFF_BUDGETS[name]}" for name in stage["upstream"])
+    return f"{template_hash(stage['prompt'], perspective_context, build_stage_crew, handoff)}:{budgets}"
+
+def run_meeting_prep(inputs, llms, search_tool, refresh=False, step_callback=None, task_callback=None):
+    cache = get_result_cache()
+    outputs = {}
+
+    def run_stage(stage):
+        upstream_outputs = {name: outputs[name] for name in stage["upstream"]}
+        declared = {name: inputs[name] for name in stage_inputs(stage)}
+        key = cache.make_stage_key(stage["name"], declared, upstream_outputs, agent_model(stage["agent"]), stage_template_hash(stage))
+        output = None if refresh else cache.get_stage(key)
+        if output is not None:
+            metrics.record(reused=1)
+            if task_callback:
+                task_callback(TaskOutput(description=stage["name"], name=stage["name"], agent=AGENT_DEFINITIONS[stage["agent"]]["role"], raw=output))
+            return output
+        # Repeated facts and search snippets are dropped and each earlier output is cut to its
+        # budget; stage["upstream"] is in pipeline order, so shared blocks stay byte-identical
+        handoffs, handoff_stats = handoff.compact_handoffs(upstream_outputs, HANDOFF_BUDGETS)
+        metrics.record(handoff_tokens=handoff_stats["tokens_out"], handoff_tokens_saved=handoff_stats["tokens_saved"])
+        output = kickoff_routed(
+            stage["agent"],
+            lambda llm, on_task: build_stage_crew(stage, llm, search_tool, inputs, handoffs, step_callback, on_task),
+            llms,
+            task_callback,
+        ).raw
+        cache.set_stage(key, stage["name"], output)
+        return output
+
+    def run_tracked_stage(stage):
+        with metrics.stage(stage["name"]):
+            return run_stage(stage)
+
+    for wave in stage_waves(MEETING_STAGES):
+        with ThreadPoolExecutor(max_workers=len(wave)) as pool:
+            # Copy the caller's context into each worker so the stage's metrics reach the run
+            futures = [pool.submit(contextvars.copy_context().run, run_tracked_stage, stage) for stage in wave]
+            for stage, future in zip(wave, futures):
+                outputs[stage["name"]] = future.result()
+
+    task_outputs = [
+        {"agent": AGENT_DEFINITIONS[stage["agent"]]["role"], "stage": stage["name"], "output": outputs[stage["name"]]}
+        for stage in MEETING_STAGES
+    ]
+    return outputs[MEETING_STAGES[-1]["name"]], task_outputs
+
+def linkedin_search(discovery_term, discovery_region):
+    # Construct the search query logic
+    if discovery_region.lower() == "india":
+        # Targeted dorking for Indian LinkedIn subdomain and keywords
+        region_filter = 'site:in.linkedin.com/posts/ OR site:in.linkedin.com/pulse/ OR (site:linkedin.com/posts/ "India")'
+        search_query = f'{region_filter} "{discovery_term}"'
+        task_description = f"Identify the top trending ideas and discussions specifically from the INDIAN LinkedIn market regarding '{discovery_term}'."
+        variants = LINKEDIN_VARIANTS + INDIA_CITY_VARIANTS
+    elif discovery_region:
+        search_query = f'site:linkedin.com/posts/ OR site:linkedin.com/pulse/ "{discovery_term}" "{discovery_region}"'
+        task_description = f"Identify the top trending ideas and discussions on LinkedIn regarding '{discovery_term}' in the {discovery_region} context."
+        variants = LINKEDIN_VARIANTS
+    else:
+        search_query = f'site:linkedin.com/posts/ OR site:linkedin.com/pulse/ "{discovery_term}"'
+        task_description = f"Identify the top trending ideas and discussions on LinkedIn regarding '{discovery_term}' in the global context."
+        variants = LINKEDIN_VARIANTS
+    return search_query, task_description, variants
+
+def harvest_discovery_sources(discovery_term, discovery_region):
+    search_query, _, variants = linkedin_search(discovery_term, discovery_region)
+    return harvest(expand_queries(search_query, variants), canonicalize_linkedin)
+
+def build_discovery_crew(llm, search_tool, discovery_term, discovery_region, sources, step_callback=None, task_callback=None):
+    # The scout only summarizes the harvested pool, so it gets no search tool
+    discovery_scout = build_agent("discovery_scout", llm, search_tool)
+    search_query, task_description, variants = linkedin_search(discovery_term, discovery_region)
+
+    discovery_task = Task(
+        description=f"""
+        {task_description}
+
+        SOURCE POOL: {len(sources["links"][:FEED_SIZE])} unique LinkedIn posts and articles, collected from {len(variants)} variations of the search query: {search_query}
+        Each line is: number. title | snippet | URL
+
+        {format_pool(sources["links"])}
+
+        REQUIREMENTS:
+        1. Identify 3-5 recurring themes from the overall pool.
+        2. LIST AT LEAST 10 NOTABLE COMPANIES active in these discussions, based only on the pool.
+        3. When citing a post, refer to it by its pool number (e.g. "see #12"). Do NOT write out URLs or a link list;
+           the numbered BULK SOURCE FEED of verified links is appended to your report automatically.
+
+        Format the report using professional markdown with headings for 'The Pulse', 'Mainstream Themes' and 'Notable Companies'.
+        """,
+        agent=discovery_scout,
+        expected_output="A Social Intelligence Report with 'The Pulse', 'Mainstream Themes' and 'Notable Companies' sections that cites pool entries by number."
+    )
+
+    return Crew(
+        agents=[discovery_scout],
+        tasks=[discovery_task],
+        verbose=True,
+        process=Process.sequential,
+        step_callback=step_callback,
+        task_callback=task_callback
+    )
+
+def instagram_search(insta_topic, insta_region):
+    # Search Logic for Instagram
+    region_suffix = f' "{insta_region}"' if insta_region else ""
+    return f'(site:instagram.com/p/ OR site:instagram.com/reels/) "{insta_topic}"{region_suffix}'
+
+def harvest_insta_sources(insta_topic, insta_region):
+    return harvest(expand_queries(instagram_search(insta_topic, insta_region), INSTAGRAM_VARIANTS), canonicalize_instagram)
+
+def build_insta_crew(llm, search_tool, insta_topic, insta_region, sources, step_callback=None, task_callback=None):
+    # The analyst only summarizes the harvested pool, so it gets no search tool
+    insta_scout = build_agent("insta_scout", llm, search_tool)
+    insta_query = instagram_search(insta_topic, insta_region)
+    # Hashtag frequencies and the reel/post split are exact computations, done in code
+    stats = instagram_stats(sources["links"])
+
+    insta_task = Task(
+        description=f"""
+        Analyze the Instagram landscape for: '{insta_topic}' {f'in {insta_region}' if insta_region else ''}.
+
+        SOURCE POOL: {len(sources["links"][:FEED_SIZE])} unique Instagram posts and reels, collected from {len(INSTAGRAM_VARIANTS)} variations of the query: {insta_query}
+        Each line is: number. title/account | caption snippet | URL
+
+        {format_pool(sources["links"])}
+
+        COMPUTED FACTS (exact counts over all {stats["total"]} unique posts and reels harvested; report them as given, do not recount):
+        {format_stats(stats)}
+
+        REQUIRED ANALYSIS:
+        1. HASHTAG CLOUD: Present the Top hashtags from the computed facts above, in the same order.
+        2. VISUAL VIBE: Based on the captions and titles, describe the common aesthetic (e.g., 'Dark academia', 'Neon futuristic', 'Minimalist organic').
+        3. PLATFORM INSIGHTS: Explain what the computed reel/post ratio says about how this topic is being driven.
+        4. When citing content, refer to it by its pool number (e.g. "see #7"). Do NOT write out URLs or a link list;
+           the numbered BULK CONTENT FEED of verified links is appended to your report automatically.
+
+        CRITICAL FORMATTING:
+        - Section 1: Trending Hashtag Cloud (Clean list of the computed top hashtags)
+        - Section 2: Visual and Creative Pulse (2-3 paragraph summary of the trend)
+        - Section 3: Platform Insights (Reel vs Post dominance)
+        """,
+        agent=insta_scout,
+        expected_output="A creative trend report with a hashtag cloud, visual analysis and platform insights that cites pool entries by number."
+    )
+
+    return Crew(
+        agents=[insta_scout],
+        tasks=[insta_task],
+        verbose=True,
+        process=Process.sequential,
+        step_callback=step_callback,
+        task_callback=task_callback
+    )
+
+# Single-task social crews; meeting prep runs through the staged pipeline above
+CREW_BUILDERS = {
+    "discovery": build_discovery_crew,
+    "insta": build_insta_crew,
+}
+SOCIAL_AGENTS = {"discovery": "discovery_scout", "insta": "insta_scout"}
+CREW_STAGE_COUNTS = {"meeting_prep": len(MEETING_STAGES), "discovery": 1, "insta": 1}
+
+# Social crews get their links from a code-side harvest instead of agent tool calls;
+# the verified feed is appended to the agent's report under these headings
+SOURCE_HARVESTERS = {
+    "discovery": (harvest_discovery_sources, "BULK SOURCE FEED"),
+    "insta": (harvest_insta_sources, "BULK CONTENT FEED"),
+}
+
+def make_llms(anthropic_api_key):
+    # Use litellm prefix 'anthropic/' to bypass native provider header bugs
+    return {tier: LLM(model=model, temperature=0.7, api_key=anthropic_api_key) for tier, model in MODEL_TIERS.items()}
+
+class CachedSerperDevTool(SerperDevTool):
+    # Same tool name and schema as SerperDevTool so agents see no difference;
+    # only the raw API request is memoized, result formatting still runs per call
+    base_url: str = SERPER_URL
+
+    def _make_api_request(self, search_query, search_type):
+        cache = get_search_cache()
+        key = cache.make_key(
+            search_query, type=search_type.lower(), num=self.n_results,
+            gl=self.country, location=self.location, hl=self.locale
+        )
+        results = cache.get(key)
+        metrics.record(search_calls=1, search_cache_hits=int(results is not None))
+        if results is None:
+            # Only real Serper requests count against the search rate limit
+            search_limiter.acquire()
+            results = super()._make_api_request(search_query, search_type)
+            cache.set(key, results, query=search_query)
+        return results
+
+def make_search_tool():
+    # SerperDevTool reads SERPER_API_KEY from the environment.
+    # Raw Serper responses are memoized on disk, so repeat queries skip the network entirely
+    return CachedSerperDevTool()
+
+# Finished runs are stored on disk keyed on the normalized inputs, the model and the
+# prompt templates, so identical requests (from any session or the CLI) reuse one LLM run
+def crew_models(kind):
+    # Which model each agent of a crew is routed to; part of the result key
+    agents = [stage["agent"] for stage in MEETING_STAGES] if kind == "meeting_prep" else [SOCIAL_AGENTS[kind]]
+    return ",".join(f"{agent}={agent_model(agent)}" for agent in agents)
+
+def result_key(kind, inputs):
+    if kind == "meeting_prep":
+        # Each stage's version already covers its prompt, the shared blocks and its handoff budgets
+        version = ",".join([template_hash(run_meeting_prep)] + [stage_template_hash(stage) for stage in MEETING_STAGES])
+    else:
+        version = template_hash(CREW_BUILDERS[kind], SOURCE_HARVESTERS[kind][0], harvest, format_pool, format_feed, instagram_stats, format_stats)
+    return get_result_cache().make_key(kind, inputs, crew_models(kind), version)
+
+def run_social_crew(kind, inputs, llms, search_tool, step_callback=None, task_callback=None):
+    harvest_sources, feed_heading = SOURCE_HARVESTERS[kind]
+    with metrics.stage("harvest"):
+        sources = harvest_sources(**inputs)
+    # A bad key, a missing one or a 429 would otherwise become a cached "no posts found" report
+    if sources["errors"] and len(sources["links"]) < FEED_SIZE:
+        raise SearchFailed(
+            f"{len(sources['errors'])} of {sources['requests']} searches failed and only {len(sources['links'])} "
+            f"links were found; first error: {sources['errors'][0]}"
+        )
+    with metrics.stage(kind):
+        result = kickoff_routed(
+            SOCIAL_AGENTS[kind],
+            lambda llm, on_task: CREW_BUILDERS[kind](llm, search_tool, **inputs, sources=sources, step_callback=step_callback, task_callback=on_task),
+            llms,
+            task_callback,
+        )
+    output = f"{result.raw}\n\n{format_feed(sources['links'], feed_heading)}"
+    task_outputs = [{"agent": getattr(task_output, "agent", ""), "output": task_output.raw} for task_output in result.tasks_output]
+    return output, task_outputs
+
+def kickoff_and_store(kind, inputs, key, llms, search_tool, step_callback=None, task_callback=None, refresh=False, on_wait=None):
+    # Identical requests already running (in another session, worker process or instance) are
+    # joined rather than repeated: one caller runs the crew and the others receive its entry
+    entry, joined = get_single_flight().run(
+        key,
+        lambda: _kickoff_and_store(kind, inputs, key, llms, search_tool, step_callback, task_callback, refresh),
+        on_wait=on_wait,
+    )
+    if joined:
+        metrics.record_coalesced(kind)
+    return dict(entry, coalesced=joined)
+
+def _kickoff_and_store(kind, inputs, key, llms, search_tool, step_callback, task_callback, refresh):
+    with metrics.track_run(kind, key) as run:
+        if kind == "meeting_prep":
+            output, task_outputs = run_meeting_prep(inputs, llms, search_tool, refresh, step_callback, task_callback)
+        else:
+            output, task_outputs = run_social_crew(kind, inputs, llms, search_tool, step_callback, task_callback)
+        # LLM event handlers run asynchronously; let them land before the run is closed
+        crewai_event_bus.flush()
+    entry = get_result_cache().set(key, kind, inputs, output, task_outputs, crew_models(kind))
+    # The breakdown describes this particular run, so it is returned but not cached with the result
+    return dict(entry, metrics=run.summary())
+
+def run_cached(kind, inputs, llms, search_tool, refresh=False, step_callback=None, task_callback=None):
+    key = result_key(kind, inputs)
+    entry = None if refresh else get_result_cache().get(key)
+    if entry is not None:
+        return dict(entry, from_cache=True)
+    entry = kickoff_and_store(kind, inputs, key, llms, search_tool, step_callback, task_callback, refresh)
+    return dict(entry, from_cache=False)
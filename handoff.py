@@ -0,0 +1,214 @@
+import re
+
+# Rule-of-thumb size of English text for Claude; only used to size handoffs, not for billing
+CHARS_PER_TOKEN = 4
+# Longest single point kept in a compacted handoff; longer ones are cut at a sentence boundary
+MAX_POINT_TOKENS = 80
+# A point counts as a near-duplicate when this share of its words appear in one earlier point.
+# Very short points ("Pricing") only match exactly, or they'd collide with everything
+DUPLICATE_OVERLAP = 0.8
+MIN_FUZZY_WORDS = 6
+OMITTED_NOTE_TOKENS = 10
+
+HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+(.*)$")
+BULLET_RE = re.compile(r"^\s*(?:[-*+•]|\d+[.)])\s+")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[*])")
+URL_RE = re.compile(r"https?://[^\s)>\]|]+")
+WORD_RE = re.compile(r"[a-z0-9]+")
+RULE_CHARS = set("-*_=|: ")
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def split_sections(markdown):
+    # [(heading, [point, ...])]: a point is one bullet (with its wrapped lines), one table
+    # row, or one sentence of a paragraph, so budgets can be spent at a fine grain
+    sections = [("", [])]
+    lines = []
+
+    def flush():
+        if lines:
+            text = " ".join(lines)
+            lines.clear()
+            sections[-1][1].extend([text] if is_bullet else SENTENCE_END_RE.split(text))
+
+    is_bullet = False
+    for line in markdown.splitlines():
+        stripped = line.strip()
+        heading = HEADING_RE.match(line)
+        if heading:
+            flush()
+            sections.append((heading.group(1).strip(" #*"), []))
+        elif not stripped or set(stripped) <= RULE_CHARS:
+            flush()
+        elif stripped.startswith("|"):
+            flush()
+            sections[-1][1].append(" | ".join(cell.strip() for cell in stripped.strip("|").split("|")))
+        elif BULLET_RE.match(line):
+            flush()
+            is_bullet = True
+            lines.append(BULLET_RE.sub("", line, count=1).strip())
+        else:
+            if not lines:
+                is_bullet = False
+            lines.append(stripped)
+    flush()
+    return [(heading, [point for point in points if point.strip()]) for heading, points in sections if heading or points]
+
+
+def shorten(point, max_tokens=MAX_POINT_TOKENS):
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(point) <= limit:
+        return point
+    sentences = SENTENCE_END_RE.split(point)
+    kept = ""
+    for sentence in sentences:
+        if len(kept) + len(sentence) + 1 > limit:
+            break
+        kept = f"{kept} {sentence}".strip()
+    return kept or point[:limit].rsplit(" ", 1)[0] + "..."
+
+
+class SeenPoints:
+    """Points already handed to the next stage, for dropping repeats of facts, links and snippets."""
+
+    def __init__(self):
+        self.exact = set()
+        self.word_sets = []
+        self.urls = set()
+        self.bare_urls = set()
+
+    @staticmethod
+    def _words(point):
+        return WORD_RE.findall(URL_RE.sub(" ", point.lower()))
+
+    def is_duplicate(self, point):
+        words = self._words(point)
+        urls = set(URL_RE.findall(point))
+        if not words:
+            # A bare link (or formatting debris) only adds something the first time
+            return not urls or urls <= self.urls | self.bare_urls
+        if " ".join(words) in self.exact:
+            return True
+        # The same search hit quoted again with a reworded title is still the same snippet
+        if urls and urls <= self.urls and len(words) < MIN_FUZZY_WORDS * 2:
+            return True
+        if len(words) < MIN_FUZZY_WORDS:
+            return False
+        unique = set(words)
+        needed = DUPLICATE_OVERLAP * len(unique)
+        return any(len(unique & earlier) >= needed for earlier in self.word_sets)
+
+    def add(self, point):
+        words = self._words(point)
+        self.exact.add(" ".join(words))
+        if len(words) >= MIN_FUZZY_WORDS:
+            self.word_sets.append(set(words))
+        # A bare link doesn't make a later point describing the same page redundant
+        (self.urls if words else self.bare_urls).update(URL_RE.findall(point))
+
+
+def omitted_sections_note(sections):
+    # One line naming the sections that didn't fit at all, so the next stage knows they exist
+    headings = [heading or "untitled" for heading, points in sections if points]
+    return f"- (left out for length: {', '.join(headings)})" if headings else ""
+
+
+def note_tokens(sections):
+    note = omitted_sections_note(sections)
+    return estimate_tokens(note) + 1 if note else 0
+
+
+def fit_budget(sections, budget):
+    # Every section keeps its leading point before any gets a second one, in order: once a
+    # section's first point doesn't fit, it and all later sections are dropped, with room kept
+    # for a note naming them. Returns the chosen (section, point) indexes
+    chosen, used, stop = set(), 0, len(sections)
+    for index, (heading, points) in enumerate(sections):
+        if not points:
+            continue
+        # The heading and a possible "left out" note are paid with the first point
+        cost = estimate_tokens(points[0]) + 1
+        cost += (estimate_tokens(heading) + 2 if heading else 0) + (OMITTED_NOTE_TOKENS if len(points) > 1 else 0)
+        if used + cost + note_tokens(sections[index + 1:]) > budget:
+            stop = index
+            break
+        chosen.add((index, 0))
+        used += cost
+    reserve = note_tokens(sections[stop:])
+    for rank in range(1, max((len(points) for _, points in sections), default=0)):
+        for index, (heading, points) in enumerate(sections[:stop]):
+            if rank >= len(points):
+                continue
+            cost = estimate_tokens(points[rank]) + 1
+            if used + cost + reserve <= budget:
+                chosen.add((index, rank))
+                used += cost
+    return chosen
+
+
+def render(sections, chosen):
+    lines, dropped = [], []
+    for index, (heading, points) in enumerate(sections):
+        kept = [point for rank, point in enumerate(points) if (index, rank) in chosen]
+        if not kept:
+            dropped.append((heading, points))
+            continue
+        if heading:
+            lines.append(f"#### {heading}")
+        lines.extend(f"- {point}" for point in kept)
+        if len(kept) < len(points):
+            lines.append(f"- ({len(points) - len(kept)} more left out for length)")
+    note = omitted_sections_note(dropped)
+    if note:
+        lines.append(note)
+    return "\n".join(lines)
+
+
+def compact_handoffs(outputs, budgets):
+    """Deduplicate and size-bound earlier stages' outputs before they are handed to the next stage.
+
+    outputs is {stage: markdown} in pipeline order; budgets is {stage: max tokens}, where a
+    missing or zero budget hands the output over unchanged. Each output only depends on the
+    ones before it, so a stage's handoff is identical for every later stage that reads it.
+    Returns ({stage: text}, {"tokens_in": ..., "tokens_out": ..., "duplicates": ...}).
+    """
+    seen = SeenPoints()
+    handoffs = {}
+    stats = {"tokens_in": 0, "tokens_out": 0, "duplicates": 0}
+    for name, output in outputs.items():
+        budget = budgets.get(name, 0)
+        stats["tokens_in"] += estimate_tokens(output)
+        sections = split_sections(output)
+        if not budget:
+            handoffs[name] = output
+            for _, points in sections:
+                for point in points:
+                    seen.add(point)
+        else:
+            block = SeenPoints()
+            unique_sections, duplicates = [], 0
+            for heading, points in sections:
+                unique = []
+                for point in points:
+                    if seen.is_duplicate(point) or block.is_duplicate(point):
+                        duplicates += 1
+                        continue
+                    block.add(point)
+                    unique.append(shorten(point))
+                unique_sections.append((heading, unique))
+            stats["duplicates"] += duplicates
+            if not duplicates and estimate_tokens(output) <= budget:
+                # Already small and new: hand it over as written
+                handoffs[name] = output
+                chosen = {(index, rank) for index, (_, points) in enumerate(unique_sections) for rank in range(len(points))}
+            else:
+                chosen = fit_budget(unique_sections, budget)
+                handoffs[name] = render(unique_sections, chosen)
+            for index, rank in sorted(chosen):
+                seen.add(unique_sections[index][1][rank])
+        stats["tokens_out"] += estimate_tokens(handoffs[name])
+    stats["tokens_saved"] = max(0, stats["tokens_in"] - stats["tokens_out"])
+    return handoffs, stats
@@ -0,0 +1,126 @@
+import contextvars
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from search_cache import serper_search
+
+logger = logging.getLogger(__name__)
+
+LINKEDIN_VARIANTS = ["", "latest", "trending", "leadership", "HR", "insights"]
+INDIA_CITY_VARIANTS = ["Bengaluru", "Mumbai", "Delhi"]
+INSTAGRAM_VARIANTS = ["", "reels", "viral", "latest", "aesthetic", "ideas"]
+
+FEED_SIZE = 50
+MAX_PAGES = 3
+MAX_WORKERS = 6
+
+_INSTAGRAM_KINDS = {"p": "p", "reel": "reel", "reels": "reel", "tv": "tv"}
+
+
+class SearchFailed(Exception):
+    """Searches failed and the pool came up short, so a report built on it would be misleading."""
+
+
+def expand_queries(base_query, variants):
+    queries = []
+    for variant in variants:
+        query = f"{base_query} {variant}".strip()
+        if query not in queries:
+            queries.append(query)
+    return queries
+
+
+def canonicalize_linkedin(url):
+    # in.linkedin.com/posts/x?utm=... and www.linkedin.com/posts/x/ are the same post
+    parts = urlsplit(url or "")
+    host = parts.netloc.lower()
+    if not (host == "linkedin.com" or host.endswith(".linkedin.com")):
+        return None
+    path = parts.path.rstrip("/")
+    if not re.match(r"^/(posts|pulse)/[^/]+", path):
+        return None
+    return f"https://www.linkedin.com{path}"
+
+
+def canonicalize_instagram(url):
+    # Handles /p/CODE, /reel/CODE, /reels/CODE and /<user>/p/CODE; /reels/ and /reel/ share one form
+    parts = urlsplit(url or "")
+    host = parts.netloc.lower()
+    if not (host == "instagram.com" or host.endswith(".instagram.com")):
+        return None
+    segments = [segment for segment in parts.path.split("/") if segment]
+    for i, segment in enumerate(segments[:-1]):
+        kind = _INSTAGRAM_KINDS.get(segment.lower())
+        if kind:
+            return f"https://www.instagram.com/{kind}/{segments[i + 1]}/"
+    return None
+
+
+def harvest(queries, canonicalize, target=FEED_SIZE, max_pages=MAX_PAGES, max_workers=MAX_WORKERS, search=None):
+    """Run every query variant page by page and return deduped links plus the raw organic results.
+
+    Pages are fetched one round at a time across all variants concurrently, and
+    paging stops as soon as the pool reaches ``target`` unique links. Results are
+    merged in query/position order, so the same search results always give the
+    same pool.
+    """
+    search = search or serper_search
+    links = {}
+    organic = []
+    requests_made = 0
+    errors = []
+
+    def fetch(query, page):
+        try:
+            return search(query, page=page)
+        except Exception as e:
+            logger.warning("Search failed for %r page %s: %s", query, page, e)
+            errors.append(f"{query} (page {page}): {e}")
+            return {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for page in range(1, max_pages + 1):
+            # Each fetch runs in a copy of the caller's context so searches are attributed to its run
+            futures = [pool.submit(contextvars.copy_context().run, fetch, query, page) for query in queries]
+            responses = [future.result() for future in futures]
+            requests_made += len(queries)
+            for query, response in zip(queries, responses):
+                for result in response.get("organic", []):
+                    organic.append(result)
+                    url = canonicalize(result.get("link", ""))
+                    if url and url not in links:
+                        links[url] = {
+                            "url": url,
+                            "title": (result.get("title") or "").strip(),
+                            "snippet": (result.get("snippet") or "").strip(),
+                            "query": query,
+                        }
+            if len(links) >= target:
+                break
+    return {"links": list(links.values()), "organic": organic, "requests": requests_made, "errors": errors}
+
+
+def _clean(text, limit):
+    text = " ".join(text.replace("[", "(").replace("]", ")").split())
+    return text if len(text) <= limit else text[: limit - 3].rstrip() + "..."
+
+
+def format_pool(links, limit=FEED_SIZE, snippet_chars=160):
+    # Compact listing for the prompt: number, title, trimmed snippet and URL
+    lines = []
+    for number, link in enumerate(links[:limit], start=1):
+        lines.append(f"{number}. {_clean(link['title'], 100)} | {_clean(link['snippet'], snippet_chars)} | {link['url']}")
+    return "\n".join(lines)
+
+
+def format_feed(links, heading, limit=FEED_SIZE):
+    # The numbered link list is rendered in code, so every URL is real and costs no output tokens
+    links = links[:limit]
+    lines = [f"## {heading} ({len(links)} LINKS)", ""]
+    if not links:
+        lines.append("No matching posts were found for these searches.")
+    for number, link in enumerate(links, start=1):
+        lines.append(f"{number}. [{_clean(link['title'], 100) or link['url']}]({link['url']})")
+    return "\n".join(lines)
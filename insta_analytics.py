@@ -0,0 +1,81 @@
+import re
+
+# Hashtags are letters/digits/underscores after '#'; pure numbers ("#1"), HTML
+# entities ("&#39;") and URL fragments ("/#section") are not tags
+HASHTAG_RE = re.compile(r"(?<![\w&/])#(\w*[^\W\d]\w*)")
+TOP_HASHTAGS = 15
+
+
+class TopKCounter:
+    """Space-Saving counter: tracks at most ``capacity`` keys, keeping the heavy hitters exact enough."""
+
+    def __init__(self, capacity=500):
+        self.capacity = capacity
+        self.counts = {}
+
+    def add(self, key):
+        if key in self.counts:
+            self.counts[key] += 1
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = 1
+        else:
+            # Replace the current minimum; ties break on key so results are reproducible
+            victim = min(self.counts, key=lambda k: (self.counts[k], k))
+            self.counts[key] = self.counts.pop(victim) + 1
+
+    def most_common(self, k):
+        return sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def extract_hashtags(text):
+    return [tag.lower() for tag in HASHTAG_RE.findall(text or "")]
+
+
+def content_type(url):
+    if "/reel/" in url or "/tv/" in url:
+        return "reel"
+    if "/p/" in url:
+        return "post"
+    return None
+
+
+def instagram_stats(links, top_k=TOP_HASHTAGS):
+    # Each unique post is counted once, even if several query variants returned it
+    hashtags = TopKCounter()
+    reels = posts = 0
+    for link in links:
+        for tag in set(extract_hashtags(f"{link['title']} {link['snippet']}")):
+            hashtags.add(tag)
+        kind = content_type(link["url"])
+        if kind == "reel":
+            reels += 1
+        elif kind == "post":
+            posts += 1
+    total = reels + posts
+    if reels > posts:
+        dominant = "Reels"
+    elif posts > reels:
+        dominant = "Static Posts"
+    else:
+        dominant = "Balanced"
+    return {
+        "hashtags": hashtags.most_common(top_k),
+        "reels": reels,
+        "posts": posts,
+        "total": total,
+        "reel_share": reels / total if total else 0.0,
+        "dominant": dominant,
+    }
+
+
+def format_stats(stats):
+    # Rendered as facts for the prompt, so the model reports the numbers instead of estimating them
+    if stats["hashtags"]:
+        tags = "\n".join(f"{rank}. #{tag} ({count})" for rank, (tag, count) in enumerate(stats["hashtags"], start=1))
+    else:
+        tags = "No hashtags appeared in the snippets."
+    return (
+        f"TOP {len(stats['hashtags'])} HASHTAGS (number of unique posts using each):\n{tags}\n\n"
+        f"CONTENT RATIO: {stats['reels']} reels vs {stats['posts']} static posts out of {stats['total']} unique items "
+        f"({stats['reel_share']:.0%} reels) -> {stats['dominant']}"
+    )
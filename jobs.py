@@ -0,0 +1,231 @@
+import contextvars
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+
+MAX_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+MAX_QUEUED = int(os.environ.get("JOB_QUEUE_SIZE", 16))
+# Finished jobs are forgotten after this long so the registry doesn't grow forever
+JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", 60 * 60))
+MAX_STREAM_CHARS = 20000
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+# The job a worker is running; context copies made for a job's own threads carry it along,
+# so code deep inside a crew (like an LLM hook) can check whether it was cancelled
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+
+def current_job():
+    return _current_job.get()
+
+
+class Job:
+    def __init__(self, kind, label="", key=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.label = label
+        self.key = key
+        # Sessions following this job; identical submissions attach instead of queueing a copy
+        self.watchers = 1
+        self.joined = False
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.total_stages = 0
+        self.completed_stages = []
+        self.stream = ""
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def cancel(self):
+        self._cancel.set()
+
+    def attach(self):
+        with self._lock:
+            self.watchers += 1
+
+    def detach(self):
+        # A shared job is only cancelled once every session following it has let go;
+        # returns True when this call cancelled it
+        with self._lock:
+            self.watchers -= 1
+            last = self.watchers <= 0
+        if last:
+            self.cancel()
+        return last
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def append_output(self, text):
+        with self._lock:
+            self.stream = (self.stream + text)[-MAX_STREAM_CHARS:]
+
+    def complete_stage(self, name, output=""):
+        with self._lock:
+            self.completed_stages.append({"name": name, "output": output, "at": time.time()})
+
+    def snapshot(self):
+        # Copy under the lock so the UI never reads a half-updated job
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "label": self.label,
+                "status": self.status,
+                "elapsed": self.elapsed,
+                "total_stages": self.total_stages,
+                "completed_stages": list(self.completed_stages),
+                "stream": self.stream,
+                "result": self.result,
+                "error": self.error,
+                "cancel_requested": self._cancel.is_set(),
+                "watchers": self.watchers,
+                "joined": self.joined,
+            }
+
+    # CrewAI callbacks: step_callback gets every agent step, task_callback every TaskOutput
+    def on_step(self, step):
+        self.check_cancelled()
+        text = getattr(step, "text", None) or getattr(step, "output", None) or str(step)
+        self.append_output(f"{text}\n\n")
+
+    def on_task(self, task_output):
+        self.complete_stage(getattr(task_output, "agent", "") or "task", getattr(task_output, "raw", ""))
+        self.check_cancelled()
+
+    # Single-flight callback: polled while another process or instance runs the identical job
+    def on_wait(self):
+        self.joined = True
+        self.check_cancelled()
+
+
+class JobRunner:
+    """Fixed pool of worker threads fed from a bounded queue."""
+
+    def __init__(self, max_workers=MAX_WORKERS, max_queued=MAX_QUEUED):
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, kind, fn, *args, label="", key=None, **kwargs):
+        # fn is called as fn(job, *args, **kwargs) on a worker thread; its return value becomes job.result.
+        # While a job with the same key is unfinished, submitting again attaches to it instead
+        with self._lock:
+            self._prune()
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and not job.finished and not job.cancel_requested:
+                        job.attach()
+                        return job
+            job = Job(kind, label, key)
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait((job, fn, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise JobQueueFull(f"All {len(self._workers)} workers are busy and {self._queue.maxsize} jobs are waiting")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "queued": sum(job.status == QUEUED for job in jobs),
+            "running": sum(job.status == RUNNING for job in jobs),
+            "workers": len(self._workers),
+        }
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        expired = [jid for jid, job in self._jobs.items() if job.finished and job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job, fn, args, kwargs = self._queue.get()
+            try:
+                self._run(job, fn, args, kwargs)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_requested:
+            job.finished_at = time.time()
+            job.status = CANCELLED
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        token = _current_job.set(job)
+        try:
+            result = fn(job, *args, **kwargs)
+        except Exception as e:
+            # Frameworks may wrap the JobCancelled raised in a callback, so trust the flag
+            if isinstance(e, JobCancelled) or job.cancel_requested:
+                status = CANCELLED
+            else:
+                job.error = f"{type(e).__name__}: {e}"
+                job.append_output(traceback.format_exc())
+                status = FAILED
+        else:
+            job.result = result
+            status = SUCCEEDED
+        finally:
+            _current_job.reset(token)
+        # finished_at is set first: a job other threads see as finished must already have it
+        job.finished_at = time.time()
+        job.status = status
@@ -1,18 +1,199 @@
 import streamlit as st
-from crewai import Agent, Task, Crew, LLM
-from crewai.process import Process
-from crewai_tools import SerperDevTool
+import importlib
 import os
-
-# Disable CrewAI telemetry and tracing to prevent UnicodeEncodeError in headers
-os.environ["OTEL_SDK_DISABLED"] = "true"
-os.environ["CREWAI_TELEMETRY_OPT_OUT"] = "true"
-os.environ["CREWAI_TELEMETRY_RECORD"] = "false"
-os.environ["OTEL_PYTHON_ID_GENERATOR"] = "random"
+import time
+
+from jobs import CANCELLED, FAILED, SUCCEEDED, JobQueueFull, JobRunner
+from meeting_inputs import MEETING_PERSPECTIVES, sanitize_input
+import metrics
+from result_cache import get_result_cache
+from search_cache import get_search_cache
+
+# CrewAI, its tools and litellm take seconds to import, so the page shell renders without
+# them and the agent stack is imported once per process, when the first job starts
+@st.cache_resource(show_spinner="Loading the agents...")
+def get_crews():
+    return importlib.import_module("crews")
+
+# The LLM clients (one per model tier) and search tool are shared by every session using the same keys
+@st.cache_resource(show_spinner=False)
+def get_llms(anthropic_api_key):
+    return get_crews().make_llms(anthropic_api_key)
+
+@st.cache_resource(show_spinner=False)
+def get_search_tool(serper_api_key):
+    # The key is only the cache key here; the tool reads SERPER_API_KEY from the environment
+    return get_crews().make_search_tool()
+
+# One worker pool per process owns every kickoff, so long runs survive widget
+# interaction and Streamlit's script threads are never pinned by a crew
+@st.cache_resource(show_spinner=False)
+def get_job_runner():
+    return JobRunner()
+
+# Prometheus text endpoint, started once per process when METRICS_PORT is set
+@st.cache_resource(show_spinner=False)
+def get_metrics_server():
+    return metrics.start_server()
+
+def run_crew_job(job, crews, kind, inputs, key, llms, search_tool, refresh):
+    job.total_stages = crews.CREW_STAGE_COUNTS[kind]
+    return crews.kickoff_and_store(
+        kind, inputs, key, llms, search_tool,
+        step_callback=job.on_step, task_callback=job.on_task, refresh=refresh, on_wait=job.on_wait,
+    )
+
+# Stops following the session's current job; a job is cancelled once no session follows it
+def leave_job(state_key):
+    job_id = st.session_state.pop(f"{state_key}_job", None)
+    job = get_job_runner().get(job_id) if job_id else None
+    if job is not None and not job.finished:
+        job.detach()
+
+# Finished runs are reused from the result cache; only misses are queued for the agents, and a
+# miss that another session is already running attaches to that job instead of queueing a copy
+def start_crew(state_key, kind, inputs, refresh=False, label=""):
+    crews = get_crews()
+    key = crews.result_key(kind, inputs)
+    entry = None if refresh else get_result_cache().get(key)
+    if entry is not None:
+        leave_job(state_key)
+        st.session_state[state_key] = dict(entry, from_cache=True)
+        return
+    try:
+        job = get_job_runner().submit(
+            kind, run_crew_job, crews, kind, inputs, key,
+            get_llms(anthropic_api_key), get_search_tool(serper_api_key), refresh, label=label, key=key
+        )
+    except JobQueueFull:
+        st.error("The server is busy with other requests. Please try again in a few minutes.")
+        return
+    if job.id == st.session_state.get(f"{state_key}_job"):
+        # Clicked again while already following this run
+        job.detach()
+    else:
+        leave_job(state_key)
+        if job.watchers > 1:
+            metrics.record_coalesced(kind)
+    st.session_state[f"{state_key}_job"] = job.id
+
+@st.fragment(run_every=2)
+def show_job_progress(state_key, job_id, running_message):
+    job = get_job_runner().get(job_id)
+    if job is None or job.finished:
+        # Let the full script pick up the result outside the fragment
+        st.rerun()
+    snapshot = job.snapshot()
+    done = len(snapshot["completed_stages"])
+    total = snapshot["total_stages"] or 1
+    if snapshot["status"] == "queued":
+        st.info("Waiting for a free worker...")
+    elif snapshot["joined"]:
+        st.info(f"An identical request is already running on another server; its result will appear here ({snapshot['elapsed']:.0f}s elapsed)")
+    else:
+        st.info(f"{running_message} ({snapshot['elapsed']:.0f}s elapsed)")
+        st.progress(min(done / total, 1.0), text=f"{done} of {snapshot['total_stages'] or '?'} stages complete")
+    for stage in snapshot["completed_stages"]:
+        with st.expander(f"Completed: {stage['name']}"):
+            st.markdown(stage["output"])
+    if snapshot["stream"]:
+        with st.expander("Live agent output"):
+            st.text(snapshot["stream"][-4000:])
+    if snapshot["watchers"] > 1:
+        st.caption(f"Shared with {snapshot['watchers'] - 1} other session(s) that asked for the same thing.")
+    if snapshot["cancel_requested"]:
+        st.caption("Cancelling after the current step...")
+    elif st.button("Cancel", key=f"cancel_{state_key}"):
+        # Other sessions following a shared run keep it going; this one just stops watching
+        if not job.detach():
+            st.session_state.pop(f"{state_key}_job", None)
+            st.rerun()
+
+def show_job(state_key, running_message):
+    job_id = st.session_state.get(f"{state_key}_job")
+    job = get_job_runner().get(job_id) if job_id else None
+    if job is not None and not job.finished:
+        show_job_progress(state_key, job_id, running_message)
+        return
+    if job is not None:
+        st.session_state.pop(f"{state_key}_job")
+        if job.status == SUCCEEDED:
+            st.session_state[state_key] = dict(job.result, from_cache=False)
+        elif job.status == FAILED:
+            st.error(f"The agents failed: {job.error}")
+        elif job.status == CANCELLED:
+            st.warning("Run cancelled.")
+    show_result(state_key)
+
+# Results are kept in session state so they survive widget reruns
+def show_result(state_key):
+    entry = st.session_state.get(state_key)
+    if not entry:
+        return
+    if entry["from_cache"]:
+        generated = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created_at"]))
+        st.caption(f"Served from cache (generated {generated}). Tick 'Force refresh' to run the agents again.")
+    elif entry.get("coalesced"):
+        st.caption("Joined an identical request that was already running; the metrics below describe that run.")
+    st.markdown(entry["output"])
+    if len(entry["task_outputs"]) > 1:
+        for stage in entry["task_outputs"]:
+            with st.expander(f"Stage output: {stage['agent']}"):
+                st.markdown(stage["output"])
+    if entry.get("metrics"):
+        show_metrics(entry["metrics"])
+
+# Meeting Preparation widgets, keyed by the crew input each one fills
+MEETING_FORM_KEYS = {
+    "your_company_name": "your_co_name",
+    "your_company_description": "your_co_desc",
+    "meeting_perspective": "perspective",
+    "company_name": "meeting_client_name",
+    "meeting_objective": "meeting_obj",
+    "attendees": "meeting_attendees",
+    "meeting_duration": "meeting_dur",
+    "focus_areas": "meeting_focus",
+}
+
+def open_prepared_brief(item):
+    # Fill the form with the meeting's inputs too, so the brief and any rerun match what's shown
+    entry = get_result_cache().get(item["key"])
+    if entry is None:
+        return
+    for field, widget_key in MEETING_FORM_KEYS.items():
+        st.session_state[widget_key] = entry["inputs"][field]
+    leave_job("meeting_prep_result")
+    st.session_state["meeting_prep_result"] = dict(entry, from_cache=True)
+
+# Briefs calendar_prep.py generated off-peak for meetings that haven't started yet
+def show_prepared_briefs():
+    upcoming = get_result_cache().upcoming_briefs()
+    if not upcoming:
+        return
+    with st.expander(f"Prepared briefs for {len(upcoming)} upcoming meeting(s)", expanded=True):
+        for item in upcoming:
+            when = time.strftime("%a %d %b %H:%M %Z", time.localtime(item["starts_at"]))
+            st.button(f"{when}: {item['label']}", key=f"prepared_{item['uid']}", on_click=open_prepared_brief, args=(item,))
+
+def show_metrics(run_metrics):
+    totals = run_metrics["totals"]
+    with st.expander(f"Run metrics: {totals['seconds']:.0f}s, {totals['input_tokens'] + totals['output_tokens']:,} tokens, ~${totals['cost_usd']:.3f}"):
+        st.caption(
+            f"{totals['llm_calls']} LLM calls ({totals['llm_errors']} failed, {totals['rate_limit_wait_seconds']:.1f}s waiting on the rate limit), "
+            f"{totals['retries']} task retries, "
+            f"{totals['cached_token_ratio']:.0%} of input tokens from the prompt cache, "
+            f"{totals['tool_calls']} agent tool calls, {totals['search_calls']} searches ({totals['search_cache_hits']} from cache), "
+            f"{totals['reused']} stages reused, {totals['fallbacks']} fallbacks to the strong model, "
+            f"{totals['handoff_tokens_saved']:,} tokens trimmed from stage handoffs"
+        )
+        st.dataframe(run_metrics["stages"], hide_index=True)
+        if run_metrics.get("models"):
+            st.dataframe([dict(tier=get_crews().model_tier(row["model"]), **row) for row in run_metrics["models"]], hide_index=True)
 
 # Streamlit app setup
 st.set_page_config(page_title="AI Meeting Agent", layout="wide")
 st.title("AI Meeting Preparation Agent")
+get_metrics_server()
 
 # Sidebar for API keys
 st.sidebar.header("API Keys")
@@ -20,11 +201,6 @@ anthropic_api_key = st.sidebar.text_input("Anthropic API Key", type="password")
 serper_api_key = st.sidebar.text_input("Serper API Key", type="password")
 
 # Check if all API keys are set
-# Sanitize inputs to remove non-ASCII characters that break headers
-def sanitize_input(text):
-    if not text: return ""
-    return text.encode("ascii", "ignore").decode("ascii")
-
 if anthropic_api_key and serper_api_key:
     # Strip whitespace from keys to prevent 403 errors
     anthropic_api_key = anthropic_api_key.strip()
@@ -34,250 +210,55 @@ if anthropic_api_key and serper_api_key:
     os.environ["ANTHROPIC_API_KEY"] = anthropic_api_key
     os.environ["SERPER_API_KEY"] = serper_api_key
 
-    # Use litellm prefix 'anthropic/' to bypass native provider header bugs
-    claude = LLM(model="anthropic/claude-sonnet-4-20250514", temperature= 0.7, api_key=anthropic_api_key)
-    search_tool = SerperDevTool()
-
     # Create Tabs
     tab1, tab2, tab3 = st.tabs(["Meeting Preparation", "LinkedIn Topic Discovery", "Instagram Trend Scout"])
 
     with tab1:
+        show_prepared_briefs()
+
         # Input fields - Your Company Context
         st.header("Your Company Details")
         your_company_name = sanitize_input(st.text_input("Your Company Name:", help="Enter your organization's name", key="your_co_name"))
         your_company_description = sanitize_input(st.text_area(
-            "Your Company Description:", 
+            "Your Company Description:",
             help="Briefly describe what your company does, key products/services, and unique value proposition",
             height=100,
             key="your_co_desc"
         ))
-        
+
         # Meeting Perspective
         meeting_perspective = st.radio(
             "Your Role in This Meeting:",
-            ["Provider/Seller (We are pitching or offering services)", 
-             "Customer/Buyer (We are evaluating or purchasing services)"],
+            MEETING_PERSPECTIVES,
             help="This helps tailor the strategy to your position in the negotiation",
             key="perspective"
         )
-        
+
         st.header("Meeting Details")
         company_name = sanitize_input(st.text_input("Client Company Name:", help="The company you're meeting with", key="meeting_client_name"))
         meeting_objective = sanitize_input(st.text_input("Meeting Objective:", help="e.g., 'Content partnership deal', 'Vendor evaluation'", key="meeting_obj"))
         attendees = sanitize_input(st.text_area("Attendees and Their Roles (one per line):", help="Include names and titles", key="meeting_attendees"))
-        meeting_duration = st.number_input("Meeting Duration (minutes):", min_value=15, max_value=180, value=60, step=15, key="meeting_dur")
+        # Default set through session state so a prepared brief can fill the field without a widget warning
+        st.session_state.setdefault("meeting_dur", 60)
+        meeting_duration = st.number_input("Meeting Duration (minutes):", min_value=15, max_value=180, step=15, key="meeting_dur")
         focus_areas = sanitize_input(st.text_input("Specific Areas of Focus or Concerns:", help="e.g., 'Pricing', 'Technical integration', '3D rendering quality'", key="meeting_focus"))
 
-        # Define perspective-specific context
-        if "Provider/Seller" in meeting_perspective:
-            perspective_context = f"""
-            CRITICAL CONTEXT: You are preparing for a meeting where YOUR COMPANY ({your_company_name}) is the PROVIDER/SELLER.
-            Your company offers: {your_company_description}
-            
-            Your goal is to:
-            1. Identify gaps or pain points at {company_name} that YOUR company can solve
-            2. Position YOUR capabilities as solutions to THEIR challenges
-            3. Prepare responses that showcase YOUR value proposition
-            4. Anticipate objections they might have about price, quality, or capabilities
-            5. Build a persuasive narrative for why they should choose YOU
-            """
-        else:
-            perspective_context = f"""
-            CRITICAL CONTEXT: You are preparing for a meeting where YOUR COMPANY ({your_company_name}) is the CUSTOMER/BUYER.
-            Your company needs: {your_company_description}
-            
-            Your goal is to:
-            1. Evaluate if {company_name} can reliably meet YOUR requirements
-            2. Identify potential risks, quality issues, or red flags
-            3. Prepare tough questions to vet THEIR capabilities
-            4. Understand negotiation leverage points for pricing and terms
-            5. Build criteria to determine if THEY are the right partner for YOU
-            """
-
-        # Define the agents
-        context_analyzer = Agent(
-            role='Meeting Context Specialist',
-            goal='Analyze and summarize key background information for the meeting',
-            backstory='You are an expert at quickly understanding complex business contexts and identifying critical information.',
-            verbose=True,
-            allow_delegation=False,
-            llm=claude,
-            tools=[search_tool]
-        )
-
-        industry_insights_generator = Agent(
-            role='Industry Expert',
-            goal='Provide in-depth industry analysis and identify key trends',
-            backstory='You are a seasoned industry analyst with a knack for spotting emerging trends and opportunities.',
-            verbose=True,
-            allow_delegation=False,
-            llm=claude,
-            tools=[search_tool]
-        )
-
-        strategy_formulator = Agent(
-            role='Meeting Strategist',
-            goal='Develop a tailored meeting strategy and detailed agenda',
-            backstory='You are a master meeting planner, known for creating highly effective strategies and agendas.',
-            verbose=True,
-            allow_delegation=False,
-            llm=claude,
-        )
-
-        executive_briefing_creator = Agent(
-            role='Communication Specialist',
-            goal='Synthesize information into concise and impactful briefings',
-            backstory='You are an expert communicator, skilled at distilling complex information into clear, actionable insights.',
-            verbose=True,
-            allow_delegation=False,
-            llm=claude,
-        )
-
-        # Define the tasks
-        context_analysis_task = Task(
-            description=f"""
-            {perspective_context}
-            
-            Analyze the context for the meeting with {company_name}, considering:
-            1. The meeting objective: {meeting_objective}
-            2. The attendees: {attendees}
-            3. The meeting duration: {meeting_duration} minutes
-            4. Specific focus areas or concerns: {focus_areas}
-            
-            YOUR COMPANY CONTEXT:
-            - Company Name: {your_company_name}
-            - What We Do: {your_company_description}
-            - Our Role: {"We are offering/selling services" if "Provider/Seller" in meeting_perspective else "We are evaluating/buying services"}
-
-            Research {company_name} thoroughly, including:
-            1. Recent news and press releases
-            2. Key products or services
-            3. Major competitors
-            4. Financial stability and market position
-            
-            CRITICAL: Frame all findings in terms of how they relate to OUR position. If we are the seller, identify their pain points. If we are the buyer, identify their reliability indicators.
-            
-            Provide a comprehensive summary of your findings, highlighting the most relevant information for the meeting context.
-            Format your output using markdown with appropriate headings and subheadings.
-            """,
-            agent=context_analyzer,
-            expected_output="A detailed analysis of the meeting context and company background, including recent developments, financial performance, and relevance to the meeting objective from YOUR company's perspective, formatted in markdown with headings and subheadings."
-        )
-
-        industry_analysis_task = Task(
-            description=f"""
-            {perspective_context}
-            
-            Based on the context analysis for {company_name} and the meeting objective: {meeting_objective}, provide an in-depth industry analysis:
-            1. Identify key trends and developments in the industry
-            2. Analyze the competitive landscape
-            3. Highlight potential opportunities and threats
-            4. Provide insights on market positioning
-            
-            YOUR COMPANY CONTEXT:
-            - Company Name: {your_company_name}
-            - What We Do: {your_company_description}
-            - Our Role: {"We are offering/selling services" if "Provider/Seller" in meeting_perspective else "We are evaluating/buying services"}
-
-            CRITICAL: If we are the SELLER, identify market gaps where OUR solution fits. If we are the BUYER, identify market risks or better alternatives we should consider.
-            
-            Ensure the analysis is relevant to the meeting objective and attendees' roles.
-            Format your output using markdown with appropriate headings and subheadings.
-            """,
-            agent=industry_insights_generator,
-            expected_output="A comprehensive industry analysis report from YOUR company's perspective, including trends, competitive landscape, opportunities, threats, and strategic positioning for YOUR role in the partnership, formatted in markdown with headings and subheadings."
-        )
-
-        strategy_development_task = Task(
-            description=f"""
-            {perspective_context}
-            
-            Using the context analysis and industry insights, develop a tailored meeting strategy and detailed agenda for the {meeting_duration}-minute meeting with {company_name}. Include:
-            1. A time-boxed agenda with clear objectives for each section
-            2. Key talking points for each agenda item
-            3. Suggested speakers or leaders for each section
-            4. Potential discussion topics and questions to drive the conversation
-            5. Strategies to address the specific focus areas and concerns: {focus_areas}
-            
-            YOUR COMPANY CONTEXT:
-            - Company Name: {your_company_name}
-            - What We Do: {your_company_description}
-            - Our Role: {"We are offering/selling services" if "Provider/Seller" in meeting_perspective else "We are evaluating/buying services"}
-
-            CRITICAL STRATEGY ALIGNMENT:
-            {"- Focus on building rapport and demonstrating value proposition" if "Provider/Seller" in meeting_perspective else "- Focus on due diligence questions and negotiation leverage"}
-            {"- Allocate time for handling objections and closing" if "Provider/Seller" in meeting_perspective else "- Allocate time for technical vetting and pricing negotiation"}
-            {"- Position YOUR company as the solution to THEIR problems" if "Provider/Seller" in meeting_perspective else "- Position YOUR requirements and ensure THEY can meet YOUR standards"}
-
-            Ensure the strategy and agenda align with the meeting objective: {meeting_objective}
-            Format your output using markdown with appropriate headings and subheadings.
-            """,
-            agent=strategy_formulator,
-            expected_output="A detailed meeting strategy and time-boxed agenda optimized for YOUR role (seller or buyer), including objectives, key talking points, and role-specific strategies, formatted in markdown with headings and subheadings."
-        )
-
-        executive_brief_task = Task(
-            description=f"""
-            {perspective_context}
-            
-            Synthesize all the gathered information into a comprehensive yet concise executive brief for the meeting with {company_name}. Create the following components:
-
-            1. A detailed one-page executive summary including:
-               - Clear statement of the meeting objective
-               - YOUR COMPANY ({your_company_name}) overview and what you bring to the table
-               - THEIR COMPANY ({company_name}) background and key attendees
-               - Critical intelligence about {company_name} and relevant industry context
-               - Top 3-5 strategic goals for the meeting FROM YOUR PERSPECTIVE
-               - Brief overview of the meeting structure and key topics to be covered
-
-            2. An in-depth list of key talking points, each supported by:
-               - Relevant data or statistics
-               - Specific examples or case studies
-               - {"How YOUR capabilities solve THEIR problems" if "Provider/Seller" in meeting_perspective else "How THEIR capabilities meet YOUR requirements"}
-               - {"Value proposition and differentiation from competitors" if "Provider/Seller" in meeting_perspective else "Due diligence points and risk assessment"}
-
-            3. Anticipate and prepare for potential questions:
-               {"- Questions THEY will ask YOU about pricing, capabilities, timeline, and guarantees" if "Provider/Seller" in meeting_perspective else "- Questions YOU should ask THEM about quality, reliability, support, and references"}
-               - Craft thoughtful, data-driven responses to each question
-               - {"Prepare objection handling for common concerns" if "Provider/Seller" in meeting_perspective else "Prepare tough vetting questions with specific metrics"}
-               - Include any supporting information or additional context that might be needed
-
-            4. Strategic recommendations and next steps:
-               - Provide 3-5 actionable recommendations based on the analysis
-               - {"Clear path to closing the deal or securing commitment" if "Provider/Seller" in meeting_perspective else "Clear evaluation criteria and vendor selection process"}
-               - Outline clear next steps for implementation or follow-up
-               - Suggest timelines or deadlines for key actions
-               - Identify potential challenges or roadblocks and propose mitigation strategies
-            
-            YOUR COMPANY CONTEXT:
-            - Company Name: {your_company_name}
-            - What We Do: {your_company_description}
-            - Our Role: {"PROVIDER/SELLER - We are pitching our solution" if "Provider/Seller" in meeting_perspective else "CUSTOMER/BUYER - We are evaluating their solution"}
-
-            CRITICAL: The entire brief must be written from the perspective of {your_company_name} meeting with {company_name}. 
-            {"All 'we/our' references should be about YOUR company selling TO them." if "Provider/Seller" in meeting_perspective else "All 'we/our' references should be about YOUR company buying FROM them."}
-            
-            Ensure the brief is comprehensive yet concise, highly actionable, and precisely aligned with the meeting objective: {meeting_objective}. 
-            The document should be structured for easy navigation and quick reference during the meeting.
-            Format your output using markdown with appropriate headings and subheadings.
-            """,
-            agent=executive_briefing_creator,
-            expected_output="A comprehensive executive brief written from YOUR company's perspective, clearly distinguishing between YOUR role and THEIR role, including summary, key talking points optimized for your position (seller or buyer), Q&A preparation with role-appropriate questions, and strategic recommendations, formatted in markdown with main headings (H1), section headings (H2), and subsection headings (H3) where appropriate. Use bullet points, numbered lists, and emphasis (bold/italic) for key information."
-        )
-
-        # Create the crew
-        meeting_prep_crew = Crew(
-            agents=[context_analyzer, industry_insights_generator, strategy_formulator, executive_briefing_creator],
-            tasks=[context_analysis_task, industry_analysis_task, strategy_development_task, executive_brief_task],
-            verbose=True,
-            process=Process.sequential
-        )
-
-        # Run the crew when the user clicks the button
+        meeting_inputs = {
+            "your_company_name": your_company_name,
+            "your_company_description": your_company_description,
+            "meeting_perspective": meeting_perspective,
+            "company_name": company_name,
+            "meeting_objective": meeting_objective,
+            "attendees": attendees,
+            "meeting_duration": meeting_duration,
+            "focus_areas": focus_areas,
+        }
+        refresh_meeting = st.checkbox("Force refresh (ignore cached brief)", key="refresh_meeting_prep")
+
+        # Build and run the crew only when the user clicks the button
         if st.button("Prepare Meeting", key="run_meeting_prep"):
-            with st.spinner("AI agents are preparing your meeting..."):
-                result = meeting_prep_crew.kickoff()        
-            st.markdown(result)
+            start_crew("meeting_prep_result", "meeting_prep", meeting_inputs, refresh_meeting, label=company_name)
+        show_job("meeting_prep_result", "AI agents are preparing your meeting...")
 
     with tab2:
         st.header("LinkedIn Topic Discovery")
@@ -285,79 +266,23 @@ if anthropic_api_key and serper_api_key:
         Search for trending ideas, corporate stances, or employee discussions across LinkedIn.
         You can search for a general topic or see what a specific company is saying about a topic.
         """)
-        
+
         discovery_term = sanitize_input(st.text_input("Enter Topic/Keyword:", placeholder="e.g., 'Generative AI in Real Estate' or 'Women's Day'", key="disc_term"))
         col1, col2 = st.columns(2)
         with col1:
             discovery_company = sanitize_input(st.text_input("Company Name (Optional):", placeholder="Limit to a specific company", key="disc_co"))
         with col2:
             discovery_region = sanitize_input(st.text_input("Region/Country (Optional):", placeholder="e.g., 'India', 'UK', 'Global'", key="disc_region"))
-        
-        # Define the Discovery Agent
-        discovery_scout = Agent(
-            role='Social Intelligence Scout',
-            goal='Discover and synthesize trending ideas, corporate stances, and employee discussions from LinkedIn with specific attention to URLs and regional nuances',
-            backstory='You are an expert at digital forensic search and trend analysis. You are particularly skilled at finding direct source links and identifying regional differences in how topics are discussed across the globe.',
-            verbose=True,
-            allow_delegation=False,
-            llm=claude,
-            tools=[search_tool]
-        )
-        
-        # Construct the search query logic
-        if discovery_region.lower() == "india":
-            # Targeted dorking for Indian LinkedIn subdomain and keywords
-            region_filter = 'site:in.linkedin.com/posts/ OR site:in.linkedin.com/pulse/ OR (site:linkedin.com/posts/ "India")'
-            search_query = f'{region_filter} "{discovery_term}"'
-            task_description = f"Identify the top trending ideas and discussions specifically from the INDIAN LinkedIn market regarding '{discovery_term}'."
-        elif discovery_region:
-            search_query = f'site:linkedin.com/posts/ OR site:linkedin.com/pulse/ "{discovery_term}" "{discovery_region}"'
-            task_description = f"Identify the top trending ideas and discussions on LinkedIn regarding '{discovery_term}' in the {discovery_region} context."
-        else:
-            search_query = f'site:linkedin.com/posts/ OR site:linkedin.com/pulse/ "{discovery_term}"'
-            task_description = f"Identify the top trending ideas and discussions on LinkedIn regarding '{discovery_term}' in the global context."
-
-        discovery_task = Task(
-            description=f"""
-            {task_description}
-            
-            Using the search query: {search_query}
-            
-            STEP-BY-STEP BULK REQUIREMENTS:
-            1. PERFORM MULTIPLE SEARCHES: Do not stop at one search. Perform at least 5 different search variations 
-               (e.g., adding keywords like 'latest', 'trending', 'HR', 'Leadership' or specific Indian cities if applicable) 
-               to gather a large pool of unique LinkedIn posts.
-            2. Find and extract as many unique LinkedIn URLs as possible.
-            3. Identify 3-5 recurring themes from the overall pool.
-            4. LIST AT LEAST 10 NOTABLE COMPANIES active in these discussions.
-            5. MANDATORY BULK URL LIST: Provide a numbered list of EXACTLY 50 direct, clickable LinkedIn URLs.
-            
-            CRITICAL INSTRUCTION FOR SOURCE FEED:
-            You MUST provide a numbered list from 1 to 50. 
-            Format: [Number]. [Post Title/Author](https://www.linkedin.com/...)
-            If you cannot find 50, provide the absolute maximum you can find, but aim for 50 by using multiple search variations.
-            Do not provide long summaries for each link in the bulk list; just the clickable title and URL.
-            
-            Format the report using professional markdown with headings for 'The Pulse', 'Mainstream Themes', 'Notable Companies', and 'BULK SOURCE FEED (50 LINKS)'.
-            """,
-            agent=discovery_scout,
-            expected_output="A Social Intelligence Report containing a numbered list of exactly 50 clickable LinkedIn URLs in the 'BULK SOURCE FEED' section."
-        )
-        
-        discovery_crew = Crew(
-            agents=[discovery_scout],
-            tasks=[discovery_task],
-            verbose=True,
-            process=Process.sequential
-        )
-        
+
+        refresh_discovery = st.checkbox("Force refresh (ignore cached report)", key="refresh_discovery")
+
         if st.button("Generate Idea Report", key="run_discovery"):
             if not discovery_term:
                 st.error("Please enter a topic or keyword to search.")
             else:
-                with st.spinner("Social Intelligence Scout is searching LinkedIn..."):
-                    result = discovery_crew.kickoff()
-                st.markdown(result)
+                discovery_inputs = {"discovery_term": discovery_term, "discovery_region": discovery_region}
+                start_crew("discovery_result", "discovery", discovery_inputs, refresh_discovery, label=discovery_term)
+        show_job("discovery_result", "Social Intelligence Scout is searching LinkedIn...")
 
     with tab3:
         st.header("Instagram Trend Scout")
@@ -365,70 +290,23 @@ if anthropic_api_key and serper_api_key:
         Extract trending hashtags, visual styles, and popular Reels/Posts for any topic.
         This tool uses search engine indexing to find public Instagram content without requiring an account.
         """)
-        
+
         insta_topic = sanitize_input(st.text_input("Enter Trend/Topic:", placeholder="e.g., 'Modern Interior Design' or 'Sustainable Tech'", key="insta_term"))
         insta_region = sanitize_input(st.text_input("Region/Country (Optional):", placeholder="e.g., 'India'", key="insta_region"))
-        
-        # Define the Instagram Agent
-        insta_scout = Agent(
-            role='Visual Trend Analyst',
-            goal='Extract viral hashtags, aesthetic patterns, and high-engagement content from Instagram search results',
-            backstory='You are a creative strategist who lives on social media. You have a "photographic memory" for hashtags and can instantly spot the common visual vibe across dozens of posts.',
-            verbose=True,
-            allow_delegation=False,
-            llm=claude,
-            tools=[search_tool]
-        )
-        
-        # Search Logic for Instagram
-        region_suffix = f' "{insta_region}"' if insta_region else ""
-        insta_query = f'(site:instagram.com/p/ OR site:instagram.com/reels/) "{insta_topic}"{region_suffix}'
-        
-        insta_task = Task(
-            description=f"""
-            Analyze the Instagram landscape for: '{insta_topic}' {f'in {insta_region}' if insta_region else ''}.
-            
-            Using the query: {insta_query}
-            
-            REQUIRED BULK ANALYSIS:
-            1. PERFORM MULTIPLE SEARCHES: Perform at least 5 different search variations 
-               (e.g., searching for reels specifically, then posts, then adding keywords like 'viral', 'latest', or regional terms) 
-               to gather a large pool of unique Instagram content.
-            2. HASHTAG HARVEST: Find every hashtag used in the search snippets. Aggregate them and list the Top 15 most frequent hashtags.
-            3. VISUAL VIBE: Based on the captions and titles, describe the common aesthetic (e.g., 'Dark academia', 'Neon futuristic', 'Minimalist organic').
-            4. CONTENT RATIO: Determine if the topic is being driven more by 'Reels' or 'Static Posts' based on the URLs found.
-            5. MANDATORY BULK URL LIST: Provide a numbered list of EXACTLY 50 direct, clickable Instagram URLs.
-            
-            CRITICAL FORMATTING:
-            - Section 1: Trending Hashtag Cloud (Clean list of 15 hashtags)
-            - Section 2: Visual and Creative Pulse (2-3 paragraph summary of the trend)
-            - Section 3: Platform Insights (Reel vs Post dominance)
-            - Section 4: BULK CONTENT FEED (50 LINKS) (Numbered list of EXACTLY 50 clickable markdown links: [Title/Account](https://instagram.com/...))
-            
-            If you cannot find 50, provide the absolute maximum you can find by being persistent with search variations.
-            """,
-            agent=insta_scout,
-            expected_output="A creative trend report with a hashtag cloud, visual analysis, and a numbered list of exactly 50 clickable Instagram URLs."
-        )
-        
-        insta_crew = Crew(
-            agents=[insta_scout],
-            tasks=[insta_task],
-            verbose=True,
-            process=Process.sequential
-        )
-        
+
+        refresh_insta = st.checkbox("Force refresh (ignore cached report)", key="refresh_insta")
+
         if st.button("Scout Instagram Trends", key="run_insta"):
             if not insta_topic:
                 st.error("Please enter a trend or topic to scout.")
             else:
-                with st.spinner("Visual Trend Analyst is harvesting Instagram data..."):
-                    result = insta_crew.kickoff()
-                st.markdown(result)
+                insta_inputs = {"insta_topic": insta_topic, "insta_region": insta_region}
+                start_crew("insta_result", "insta", insta_inputs, refresh_insta, label=insta_topic)
+        show_job("insta_result", "Visual Trend Analyst is harvesting Instagram data...")
 
     st.sidebar.markdown("""
     ## How to use this app:
-    
+
     ### Meeting Preparation Tab:
     1. Provide your company details and meeting perspective.
     2. Enter the client company information and meeting details.
@@ -446,5 +324,11 @@ if anthropic_api_key and serper_api_key:
     ---
     **Required:** Anthropic and Serper API keys in the sidebar.
     """)
+
+    search_stats = get_search_cache().stats()
+    st.sidebar.caption(
+        f"Search cache: {search_stats['hits']} hits / {search_stats['misses']} misses "
+        f"({search_stats['hit_rate']:.0%} hit rate, {search_stats['entries']} entries)"
+    )
 else:
-    st.warning("Please enter all API keys in the sidebar before proceeding.")
\ No newline at end of file
+    st.warning("Please enter all API keys in the sidebar before proceeding.")
@@ -0,0 +1,17 @@
+# Form fields and input cleanup shared by the Streamlit UI, the batch CLI and the crews.
+# Kept free of CrewAI imports so the UI shell can render before the agent stack loads.
+
+SELLER_PERSPECTIVE = "Provider/Seller (We are pitching or offering services)"
+BUYER_PERSPECTIVE = "Customer/Buyer (We are evaluating or purchasing services)"
+MEETING_PERSPECTIVES = [SELLER_PERSPECTIVE, BUYER_PERSPECTIVE]
+
+# Fields the meeting-prep stages read, shared by the Streamlit form and the batch CLI
+MEETING_FIELDS = [
+    "your_company_name", "your_company_description", "meeting_perspective",
+    "company_name", "meeting_objective", "attendees", "meeting_duration", "focus_areas",
+]
+
+# Sanitize inputs to remove non-ASCII characters that break headers
+def sanitize_input(text):
+    if not text: return ""
+    return text.encode("ascii", "ignore").decode("ascii")
@@ -0,0 +1,309 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from storage import cache_path
+
+logger = logging.getLogger(__name__)
+
+METRICS_PATH = os.environ.get("METRICS_PATH", cache_path("metrics.jsonl"))
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+
+# USD per million tokens; matched on the model name prefix after the provider
+MODEL_PRICES = {
+    "claude-opus-4": {"input": 15.0, "output": 75.0, "cache_read": 1.50, "cache_write": 18.75},
+    "claude-sonnet-4": {"input": 3.0, "output": 15.0, "cache_read": 0.30, "cache_write": 3.75},
+    "claude-haiku-4": {"input": 1.0, "output": 5.0, "cache_read": 0.10, "cache_write": 1.25},
+    "claude-3-5-haiku": {"input": 0.80, "output": 4.0, "cache_read": 0.08, "cache_write": 1.0},
+}
+
+# Counters kept per stage; all of them are summed into the run totals
+STAGE_FIELDS = [
+    "seconds",
+    "llm_calls",
+    "llm_seconds",
+    "llm_errors",
+    "retries",
+    "input_tokens",
+    "output_tokens",
+    "cached_tokens",
+    "cache_write_tokens",
+    "cost_usd",
+    "rate_limit_wait_seconds",
+    "tool_calls",
+    "search_calls",
+    "search_cache_hits",
+    "reused",
+    "fallbacks",
+    "handoff_tokens",
+    "handoff_tokens_saved",
+]
+# LLM counters also kept per model, for per-tier latency and cost
+MODEL_FIELDS = ["llm_calls", "llm_seconds", "llm_errors", "input_tokens", "output_tokens", "cached_tokens", "cost_usd"]
+
+_current_run = contextvars.ContextVar("metrics_run", default=None)
+_current_stage = contextvars.ContextVar("metrics_stage", default=None)
+
+
+def model_price(model):
+    name = (model or "").split("/")[-1]
+    for prefix, price in MODEL_PRICES.items():
+        if name.startswith(prefix):
+            return price
+    return None
+
+
+def estimate_cost(model, input_tokens, output_tokens, cached_tokens=0, cache_write_tokens=0):
+    # input_tokens includes cache reads and writes, which are billed at their own rates
+    price = model_price(model)
+    if price is None:
+        return 0.0
+    uncached = max(0, input_tokens - cached_tokens - cache_write_tokens)
+    return (
+        uncached * price["input"]
+        + cached_tokens * price["cache_read"]
+        + cache_write_tokens * price["cache_write"]
+        + output_tokens * price["output"]
+    ) / 1_000_000
+
+
+class RunMetrics:
+    """Counters for one crew run, broken down by stage (pipeline step or crew task)."""
+
+    def __init__(self, kind, key=""):
+        self.kind = kind
+        self.key = key
+        self.started_at = time.time()
+        self.seconds = 0.0
+        self.status = "running"
+        self.stages = {}
+        self.models = {}
+        self._lock = threading.Lock()
+        self._llm_started = {}
+
+    def add(self, stage, **counts):
+        with self._lock:
+            record = self.stages.setdefault(stage, dict.fromkeys(STAGE_FIELDS, 0))
+            for field, value in counts.items():
+                record[field] += value
+
+    def add_model(self, model, **counts):
+        with self._lock:
+            record = self.models.setdefault(model, dict.fromkeys(MODEL_FIELDS, 0))
+            for field, value in counts.items():
+                record[field] += value
+
+    def llm_started(self, call_id, timestamp):
+        with self._lock:
+            self._llm_started[call_id] = timestamp
+
+    def llm_seconds(self, call_id, timestamp):
+        with self._lock:
+            started = self._llm_started.pop(call_id, None)
+        return (timestamp - started).total_seconds() if started is not None else 0.0
+
+    def totals(self):
+        with self._lock:
+            totals = dict.fromkeys(STAGE_FIELDS, 0)
+            for record in self.stages.values():
+                for field in STAGE_FIELDS:
+                    totals[field] += record[field]
+        # Stages overlap when they run in parallel, so wall time is the run's own clock
+        totals["seconds"] = self.seconds
+        return totals
+
+    def summary(self):
+        with self._lock:
+            stages = [dict(stage=name, **_rounded(record)) for name, record in self.stages.items()]
+            models = [dict(model=name, **_rounded_model(record)) for name, record in self.models.items()]
+        return {
+            "kind": self.kind,
+            "key": self.key,
+            "status": self.status,
+            "started_at": self.started_at,
+            "totals": _rounded(self.totals()),
+            "stages": stages,
+            "models": models,
+        }
+
+
+def _rounded(record):
+    record = dict(record)
+    for field in ("seconds", "llm_seconds", "rate_limit_wait_seconds"):
+        record[field] = round(record[field], 2)
+    record["cost_usd"] = round(record["cost_usd"], 4)
+    # Share of input tokens read from the provider's prompt cache
+    record["cached_token_ratio"] = round(record["cached_tokens"] / record["input_tokens"], 3) if record["input_tokens"] else 0.0
+    return record
+
+
+def _rounded_model(record):
+    record = dict(record)
+    record["mean_llm_seconds"] = round(record["llm_seconds"] / record["llm_calls"], 2) if record["llm_calls"] else 0.0
+    record["llm_seconds"] = round(record["llm_seconds"], 2)
+    record["cost_usd"] = round(record["cost_usd"], 4)
+    return record
+
+
+@contextmanager
+def track_run(kind, key=""):
+    run = RunMetrics(kind, key)
+    token = _current_run.set(run)
+    started = time.monotonic()
+    try:
+        yield run
+        run.status = "succeeded"
+    except Exception as e:
+        run.status = f"failed: {type(e).__name__}"
+        raise
+    finally:
+        run.seconds = time.monotonic() - started
+        _current_run.reset(token)
+        _finish_run(run)
+
+
+@contextmanager
+def stage(name):
+    # Everything recorded while the stage is active (LLM events, searches, waits) is attributed to it
+    run = _current_run.get()
+    token = _current_stage.set(name)
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+        if run is not None:
+            run.add(name, seconds=time.monotonic() - started)
+
+
+def record(**counts):
+    run, name = _current_run.get(), _current_stage.get()
+    if run is not None and name is not None:
+        run.add(name, **counts)
+
+
+# LLM events are handled off-thread, so latency comes from the events' own timestamps
+def llm_call_started(call_id, timestamp):
+    run = _current_run.get()
+    if run is not None:
+        run.llm_started(call_id, timestamp)
+
+
+def llm_call_finished(call_id, timestamp, model, usage, failed=False):
+    run = _current_run.get()
+    if run is None:
+        return
+    seconds = run.llm_seconds(call_id, timestamp)
+    if failed:
+        record(llm_errors=1, llm_seconds=seconds)
+        run.add_model(model or "", llm_errors=1, llm_seconds=seconds)
+        return
+    usage = usage or {}
+    input_tokens = usage.get("input_tokens", usage.get("prompt_tokens", 0)) or 0
+    output_tokens = usage.get("output_tokens", usage.get("completion_tokens", 0)) or 0
+    cached_tokens = usage.get("cached_prompt_tokens", 0) or 0
+    cache_write_tokens = usage.get("cache_creation_tokens", 0) or 0
+    cost_usd = estimate_cost(model, input_tokens, output_tokens, cached_tokens, cache_write_tokens)
+    record(
+        llm_calls=1,
+        llm_seconds=seconds,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cached_tokens=cached_tokens,
+        cache_write_tokens=cache_write_tokens,
+        cost_usd=cost_usd,
+    )
+    run.add_model(
+        model or "",
+        llm_calls=1,
+        llm_seconds=seconds,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cached_tokens=cached_tokens,
+        cost_usd=cost_usd,
+    )
+
+
+# Process-wide totals per (kind, stage) and per model for the Prometheus endpoint
+_totals = {}
+_model_totals = {}
+_run_counts = {}
+_sink_lock = threading.Lock()
+
+
+def _finish_run(run):
+    summary = run.summary()
+    with _sink_lock:
+        key = (run.kind, run.status.split(":")[0])
+        _run_counts[key] = _run_counts.get(key, 0) + 1
+        for stage_record in summary["stages"]:
+            totals = _totals.setdefault((run.kind, stage_record["stage"]), dict.fromkeys(STAGE_FIELDS, 0))
+            for field in STAGE_FIELDS:
+                totals[field] += stage_record[field]
+        for model_record in summary["models"]:
+            totals = _model_totals.setdefault(model_record["model"], dict.fromkeys(MODEL_FIELDS, 0))
+            for field in MODEL_FIELDS:
+                totals[field] += model_record[field]
+        if not METRICS_PATH:
+            return
+        try:
+            os.makedirs(os.path.dirname(METRICS_PATH) or ".", exist_ok=True)
+            with open(METRICS_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(summary) + "\n")
+        except OSError as e:
+            logger.warning("Could not write run metrics to %s: %s", METRICS_PATH, e)
+
+
+def record_coalesced(kind):
+    # A request answered by joining an identical run already in flight; shows up as
+    # meeting_agent_runs_total{status="coalesced"}
+    with _sink_lock:
+        _run_counts[(kind, "coalesced")] = _run_counts.get((kind, "coalesced"), 0) + 1
+
+
+def prometheus_text():
+    lines = ["# TYPE meeting_agent_runs_total counter"]
+    with _sink_lock:
+        for (kind, status), count in sorted(_run_counts.items()):
+            lines.append(f'meeting_agent_runs_total{{kind="{kind}",status="{status}"}} {count}')
+        for field in STAGE_FIELDS:
+            name = f"meeting_agent_stage_{field}_total"
+            lines.append(f"# TYPE {name} counter")
+            for (kind, stage_name), totals in sorted(_totals.items()):
+                lines.append(f'{name}{{kind="{kind}",stage="{stage_name}"}} {totals[field]}')
+        for field in MODEL_FIELDS:
+            name = f"meeting_agent_model_{field}_total"
+            lines.append(f"# TYPE {name} counter")
+            for model, totals in sorted(_model_totals.items()):
+                lines.append(f'{name}{{model="{model}"}} {totals[field]}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=METRICS_PORT, host="127.0.0.1"):
+    # Serves the Prometheus text format on a daemon thread; returns None when disabled
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,48 @@
+import os
+import threading
+import time
+
+
+class RateLimiter:
+    """Thread-safe token bucket; a rate of 0 disables limiting."""
+
+    def __init__(self, per_minute=0, burst=None):
+        self._lock = threading.Lock()
+        self.configure(per_minute, burst)
+
+    def configure(self, per_minute, burst=None):
+        with self._lock:
+            self.per_minute = per_minute or 0
+            self.capacity = burst or max(1, int(self.per_minute // 6) or 1)
+            self._tokens = float(self.capacity)
+            self._updated = time.monotonic()
+
+    def acquire(self):
+        # Blocks until a call is allowed and returns how long the caller waited
+        waited = 0.0
+        while True:
+            with self._lock:
+                if not self.per_minute:
+                    return waited
+                now = time.monotonic()
+                rate = self.per_minute / 60.0
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / rate
+            time.sleep(delay)
+            waited += delay
+
+
+# Process-wide limits shared by every crew, the UI and the batch CLI
+llm_limiter = RateLimiter(float(os.environ.get("LLM_CALLS_PER_MINUTE", 0)))
+search_limiter = RateLimiter(float(os.environ.get("SEARCH_CALLS_PER_MINUTE", 0)))
+
+
+def configure(llm_per_minute=None, search_per_minute=None):
+    if llm_per_minute is not None:
+        llm_limiter.configure(llm_per_minute)
+    if search_per_minute is not None:
+        search_limiter.configure(search_per_minute)
@@ -0,0 +1,147 @@
+import hashlib
+import inspect
+import json
+import os
+import time
+
+from storage import cache_path, connect, init_database, singleton
+
+DEFAULT_TTL_SECONDS = int(os.environ.get("RESULT_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60))
+
+
+def normalize_inputs(inputs):
+    # Inputs are already ASCII-sanitized by the UI; also ignore case and
+    # whitespace differences so "Acme Corp " and "acme corp" share a result
+    normalized = {}
+    for name, value in sorted(inputs.items()):
+        if isinstance(value, str):
+            value = " ".join(value.lower().split())
+        normalized[name] = value
+    return normalized
+
+
+def template_hash(*builders):
+    # Hash the source of the crew builders so any prompt edit invalidates old results
+    digest = hashlib.sha256()
+    for builder in builders:
+        digest.update(inspect.getsource(builder).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """Persistent store of final (and per-task) crew outputs keyed on normalized inputs."""
+
+    def __init__(self, path=None, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path or cache_path("results.sqlite3")
+        self.ttl_seconds = ttl_seconds
+        init_database(
+            self.path,
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, kind TEXT, inputs TEXT, output TEXT,"
+            " task_outputs TEXT, model TEXT, created_at REAL)",
+            "CREATE INDEX IF NOT EXISTS results_kind_created ON results (kind, created_at)",
+            "CREATE TABLE IF NOT EXISTS stages (key TEXT PRIMARY KEY, stage TEXT, output TEXT, created_at REAL)",
+            "CREATE TABLE IF NOT EXISTS scheduled ("
+            " uid TEXT PRIMARY KEY, starts_at REAL, label TEXT, key TEXT, status TEXT, error TEXT, updated_at REAL)",
+        )
+
+    def make_key(self, kind, inputs, model, prompt_version):
+        payload = {"kind": kind, "inputs": normalize_inputs(inputs), "model": model, "prompt_version": prompt_version}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _row_to_entry(self, row):
+        key, kind, inputs, output, task_outputs, model, created_at = row
+        return {
+            "key": key,
+            "kind": kind,
+            "inputs": json.loads(inputs),
+            "output": output,
+            "task_outputs": json.loads(task_outputs),
+            "model": model,
+            "created_at": created_at,
+        }
+
+    def get(self, key):
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT key, kind, inputs, output, task_outputs, model, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = self._row_to_entry(row)
+        if self.ttl_seconds and entry["created_at"] + self.ttl_seconds <= time.time():
+            return None
+        return entry
+
+    def set(self, key, kind, inputs, output, task_outputs=(), model=""):
+        entry = {
+            "key": key,
+            "kind": kind,
+            "inputs": dict(inputs),
+            "output": output,
+            "task_outputs": list(task_outputs),
+            "model": model,
+            "created_at": time.time(),
+        }
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, kind, inputs, output, task_outputs, model, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(entry["inputs"]), output, json.dumps(entry["task_outputs"]), model, entry["created_at"]),
+            )
+        return entry
+
+    # Stage outputs are keyed on only the inputs a stage reads plus its upstream outputs,
+    # so an edit invalidates just the stages downstream of it
+    def make_stage_key(self, stage, inputs, upstream_outputs, model, prompt_version):
+        payload = {
+            "stage": stage,
+            "inputs": normalize_inputs(inputs),
+            "upstream": {name: hashlib.sha256(output.encode("utf-8")).hexdigest() for name, output in upstream_outputs.items()},
+            "model": model,
+            "prompt_version": prompt_version,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get_stage(self, key):
+        with connect(self.path) as conn:
+            row = conn.execute("SELECT output, created_at FROM stages WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl_seconds and row[1] + self.ttl_seconds <= time.time()):
+            return None
+        return row[0]
+
+    def set_stage(self, key, stage, output):
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stages (key, stage, output, created_at) VALUES (?, ?, ?, ?)",
+                (key, stage, output, time.time()),
+            )
+
+    # Calendar meetings the scheduler prepared a brief for, so the app can offer them before they start
+    def set_scheduled(self, uid, starts_at, label, key, status, error=""):
+        now = time.time()
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scheduled (uid, starts_at, label, key, status, error, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (uid, starts_at, label, key, status, error, now),
+            )
+            conn.execute("DELETE FROM scheduled WHERE starts_at < ?", (now - 24 * 60 * 60,))
+
+    def upcoming_briefs(self, limit=10):
+        now = time.time()
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT s.uid, s.starts_at, s.label, s.key FROM scheduled s JOIN results r ON r.key = s.key"
+                " WHERE s.status = 'ready' AND s.starts_at >= ? AND (? = 0 OR r.created_at + ? > ?)"
+                " ORDER BY s.starts_at LIMIT ?",
+                (now, self.ttl_seconds, self.ttl_seconds, now, limit),
+            ).fetchall()
+        return [{"uid": uid, "starts_at": starts_at, "label": label, "key": key} for uid, starts_at, label, key in rows]
+
+    def delete(self, key):
+        with connect(self.path) as conn:
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+
+
+get_result_cache = singleton(ResultCache)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+import metrics
+from rate_limit import search_limiter
+from storage import cache_path, connect, init_database, singleton
+
+DEFAULT_TTL_SECONDS = int(os.environ.get("SEARCH_CACHE_TTL_SECONDS", 24 * 60 * 60))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", 5000))
+# Overridable so the offline benchmark can point both search paths at a local fake
+SERPER_URL = os.environ.get("SERPER_URL", "https://google.serper.dev")
+
+
+def normalize_query(query):
+    # Google treats queries case-insensitively and ignores repeated whitespace,
+    # so "Acme  Corp news" and "acme corp news" should share one cache entry
+    return " ".join((query or "").lower().split())
+
+
+class SearchCache:
+    """On-disk search result cache with per-entry TTL and an LRU size bound."""
+
+    def __init__(self, path=None, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or cache_path("search_cache.sqlite3")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+        init_database(
+            self.path,
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, query TEXT, value TEXT,"
+            " created_at REAL, expires_at REAL, last_access REAL)",
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)",
+        )
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def make_key(self, query, **params):
+        payload = {"q": normalize_query(query), **{k: v for k, v in sorted(params.items()) if v not in (None, "")}}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with connect(self.path) as conn:
+            row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._count("expired")
+                self._count("misses")
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return json.loads(value)
+
+    def set(self, key, value, query="", ttl_seconds=None):
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = now + ttl if ttl else None
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, query, value, created_at, expires_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, normalize_query(query), json.dumps(value), now, expires_at, now),
+            )
+            conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            overflow = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN"
+                    " (SELECT key FROM entries ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self._count("evictions", overflow)
+        self._count("writes")
+
+    def clear(self):
+        with connect(self.path) as conn:
+            conn.execute("DELETE FROM entries")
+
+    def stats(self):
+        with connect(self.path) as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["entries"] = entries
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+get_search_cache = singleton(SearchCache)
+
+
+def serper_search(query, page=1, num=10, search_type="search"):
+    # Direct, paged Serper request for code-side harvesting; shares the cache and
+    # rate limit with the agents' tool
+    cache = get_search_cache()
+    key = cache.make_key(query, type=search_type, num=num, page=page)
+    results = cache.get(key)
+    metrics.record(search_calls=1, search_cache_hits=int(results is not None))
+    if results is None:
+        search_limiter.acquire()
+        response = requests.post(
+            f"{SERPER_URL}/{search_type}",
+            headers={"X-API-KEY": os.environ["SERPER_API_KEY"], "content-type": "application/json"},
+            json={"q": query, "num": num, "page": page},
+            timeout=10,
+        )
+        response.raise_for_status()
+        results = response.json()
+        cache.set(key, results, query=query)
+    return results
@@ -0,0 +1,223 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+from jobs import JobCancelled
+from storage import cache_path, connect, init_database, singleton
+
+# Where identical runs are coordinated: "" or "local" within this process, "sqlite" (or
+# "sqlite:///path") between processes sharing a disk, "redis://host:6379/0" between instances
+SINGLE_FLIGHT_URL = os.environ.get("SINGLE_FLIGHT_URL", "")
+# The leader renews its lease while it runs; if it dies, a waiting caller takes over after this long
+LEASE_SECONDS = float(os.environ.get("SINGLE_FLIGHT_LEASE_SECONDS", 60))
+POLL_SECONDS = 1.0
+# Published results only need to outlive the callers that were waiting on them
+RESULT_RETENTION_SECONDS = 10 * 60
+
+
+class SingleFlightError(Exception):
+    """The run a caller joined failed; carries the leader's error."""
+
+
+class LocalBackend:
+    """Leases and published results in memory, for coalescing within one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._leases = {}
+        self._results = {}
+
+    def acquire(self, key, owner, ttl):
+        # Takes a free or expired lease, or renews one this owner already holds
+        now = time.time()
+        with self._lock:
+            holder = self._leases.get(key)
+            if holder is not None and holder[0] != owner and holder[1] > now:
+                return False
+            self._leases[key] = (owner, now + ttl)
+            return True
+
+    def release(self, key, owner):
+        with self._lock:
+            if self._leases.get(key, (None,))[0] == owner:
+                del self._leases[key]
+
+    def publish(self, key, payload, ttl):
+        now = time.time()
+        with self._lock:
+            for stale in [k for k, (_, expires_at, _) in self._results.items() if expires_at <= now]:
+                del self._results[stale]
+            self._results[key] = (now, now + ttl, payload)
+
+    def result(self, key):
+        # Returns (published_at, payload) or None
+        with self._lock:
+            published = self._results.get(key)
+        if published is None or published[1] <= time.time():
+            return None
+        return published[0], published[2]
+
+
+class SQLiteBackend:
+    """Leases and published results in a SQLite file, shared by processes on one host or volume."""
+
+    def __init__(self, path=None):
+        self.path = path or cache_path("single_flight.sqlite3")
+        init_database(
+            self.path,
+            "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT, expires_at REAL)",
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, published_at REAL, expires_at REAL, payload TEXT)",
+        )
+
+    def acquire(self, key, owner, ttl):
+        now = time.time()
+        with connect(self.path) as conn:
+            # The upsert only overwrites an expired lease or our own, so exactly one caller wins
+            cursor = conn.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+                " WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                (key, owner, now + ttl, now),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, key, owner):
+        with connect(self.path) as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def publish(self, key, payload, ttl):
+        now = time.time()
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, published_at, expires_at, payload) VALUES (?, ?, ?, ?)",
+                (key, now, now + ttl, payload),
+            )
+            conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+
+    def result(self, key):
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT published_at, payload FROM results WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return tuple(row) if row else None
+
+
+class RedisBackend:
+    """Leases and published results in Redis (or any server speaking its protocol), shared by instances."""
+
+    # Compare-and-set, so a leader whose lease expired can't renew or delete its successor's
+    ACQUIRE_SCRIPT = (
+        "local holder = redis.call('get', KEYS[1]) "
+        "if holder == false or holder == ARGV[1] then "
+        "redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[2]) return 1 end "
+        "return 0"
+    )
+    RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url=None, client=None, prefix="meeting-agent:single-flight:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("SINGLE_FLIGHT_URL points at Redis but the redis package is not installed (pip install redis)") from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def acquire(self, key, owner, ttl):
+        return self.client.eval(self.ACQUIRE_SCRIPT, 1, f"{self.prefix}lease:{key}", owner, int(ttl * 1000)) == 1
+
+    def release(self, key, owner):
+        self.client.eval(self.RELEASE_SCRIPT, 1, f"{self.prefix}lease:{key}", owner)
+
+    def publish(self, key, payload, ttl):
+        value = json.dumps({"published_at": time.time(), "payload": payload})
+        self.client.set(f"{self.prefix}result:{key}", value, ex=int(ttl))
+
+    def result(self, key):
+        value = self.client.get(f"{self.prefix}result:{key}")
+        if value is None:
+            return None
+        published = json.loads(value)
+        return published["published_at"], published["payload"]
+
+
+def make_backend(url=SINGLE_FLIGHT_URL):
+    if not url or url == "local":
+        return LocalBackend()
+    if url == "sqlite":
+        return SQLiteBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported SINGLE_FLIGHT_URL {url!r}; use local, sqlite, sqlite:///path or redis://host:port/db")
+
+
+class SingleFlight:
+    """Runs at most one copy of a keyed job at a time; identical concurrent calls share its result."""
+
+    def __init__(self, backend, lease_seconds=LEASE_SECONDS, poll_seconds=POLL_SECONDS):
+        self.backend = backend
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+
+    def run(self, key, fn, on_wait=None):
+        # Returns (value, joined). fn's value must be JSON-serializable so other processes can
+        # read it; on_wait is called on every poll while another caller's run is in flight
+        owner = uuid.uuid4().hex
+        requested_at = time.time()
+        while True:
+            # Only results finished after this request count, so a forced refresh isn't
+            # answered with a run that completed before it was asked for
+            published = self._published(key, requested_at)
+            if published is not None:
+                return published, True
+            if self.backend.acquire(key, owner, self.lease_seconds):
+                # The previous leader may have published just before releasing its lease
+                published = self._published(key, requested_at)
+                if published is not None:
+                    self.backend.release(key, owner)
+                    return published, True
+                return self._lead(key, owner, fn), False
+            if on_wait is not None:
+                on_wait()
+            time.sleep(self.poll_seconds)
+
+    def _published(self, key, since):
+        published = self.backend.result(key)
+        if published is None or published[0] < since:
+            return None
+        payload = json.loads(published[1])
+        if "error" in payload:
+            raise SingleFlightError(payload["error"])
+        return payload["value"]
+
+    def _lead(self, key, owner, fn):
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._renew, args=(key, owner, stop), name="single-flight-lease", daemon=True)
+        heartbeat.start()
+        try:
+            value = fn()
+        except JobCancelled:
+            # Nobody asked for the cancellation but this caller; a waiting one takes over
+            raise
+        except Exception as e:
+            self.backend.publish(key, json.dumps({"error": f"{type(e).__name__}: {e}"}), RESULT_RETENTION_SECONDS)
+            raise
+        else:
+            self.backend.publish(key, json.dumps({"value": value}), RESULT_RETENTION_SECONDS)
+            return value
+        finally:
+            stop.set()
+            heartbeat.join()
+            self.backend.release(key, owner)
+
+    def _renew(self, key, owner, stop):
+        while not stop.wait(self.lease_seconds / 3):
+            self.backend.acquire(key, owner, self.lease_seconds)
+
+
+get_single_flight = singleton(lambda: SingleFlight(make_backend()))
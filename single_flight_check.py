@@ -0,0 +1,182 @@
+"""Offline checks for the single-flight backends, including Redis through an in-memory stand-in.
+
+Example:
+    python single_flight_check.py
+
+Each backend (local, SQLite, and Redis via FakeRedis) is run through the same checks:
+
+    acquire     a held lease can't be taken by another owner
+    renew       the holder re-acquiring extends its lease past the original expiry
+    takeover    an expired lease goes to the next caller, and the old holder can't release it
+    waiters     concurrent identical calls run fn once and all get its result
+    errors      a failed run's error reaches the callers that were waiting on it
+    dead leader a caller stuck behind a lease nobody renews takes over once it expires
+
+No Redis server or network access is needed.
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+
+from single_flight import LocalBackend, RedisBackend, SingleFlight, SingleFlightError, SQLiteBackend
+
+# Short enough to keep the checks quick, long enough for slow CI machines
+LEASE_SECONDS = 0.6
+POLL_SECONDS = 0.05
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis client calls RedisBackend makes: get, set and eval of its two scripts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def _get(self, key):
+        value, expires_at = self._data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def _set(self, key, value, ttl=None):
+        # Stored as bytes, like a client without decode_responses returns them
+        value = value if isinstance(value, bytes) else str(value).encode("utf-8")
+        self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key, value, ex=None, px=None):
+        with self._lock:
+            self._set(key, value, ex if ex is not None else px / 1000 if px is not None else None)
+        return True
+
+    def eval(self, script, numkeys, *args):
+        key, argv = args[0], [str(arg).encode("utf-8") for arg in args[numkeys:]]
+        with self._lock:
+            holder = self._get(key)
+            if script == RedisBackend.ACQUIRE_SCRIPT:
+                if holder is None or holder == argv[0]:
+                    self._set(key, argv[0], int(argv[1]) / 1000)
+                    return 1
+                return 0
+            if script == RedisBackend.RELEASE_SCRIPT:
+                if holder == argv[0]:
+                    del self._data[key]
+                    return 1
+                return 0
+        raise NotImplementedError("FakeRedis only runs RedisBackend's scripts")
+
+
+def check_acquire(backend):
+    assert backend.acquire("acquire", "a", LEASE_SECONDS)
+    assert not backend.acquire("acquire", "b", LEASE_SECONDS), "a second owner took a held lease"
+    backend.release("acquire", "a")
+    assert backend.acquire("acquire", "b", LEASE_SECONDS), "a released lease was not free"
+
+
+def check_renew(backend):
+    assert backend.acquire("renew", "a", LEASE_SECONDS)
+    time.sleep(LEASE_SECONDS * 0.6)
+    assert backend.acquire("renew", "a", LEASE_SECONDS), "the holder could not renew its lease"
+    time.sleep(LEASE_SECONDS * 0.6)
+    assert not backend.acquire("renew", "b", LEASE_SECONDS), "a renewed lease expired on its original schedule"
+
+
+def check_takeover(backend):
+    assert backend.acquire("takeover", "a", LEASE_SECONDS)
+    time.sleep(LEASE_SECONDS * 1.2)
+    assert backend.acquire("takeover", "b", LEASE_SECONDS), "an expired lease was not taken over"
+    backend.release("takeover", "a")
+    assert not backend.acquire("takeover", "c", LEASE_SECONDS), "the old holder released its successor's lease"
+
+
+def run_concurrently(flight, key, fn, callers=5):
+    results = [None] * callers
+
+    def call(index):
+        try:
+            results[index] = flight.run(key, fn)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def check_waiters(backend):
+    flight = SingleFlight(backend, LEASE_SECONDS, POLL_SECONDS)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        # Outlives the lease, so only the heartbeat keeps waiters from taking over
+        time.sleep(LEASE_SECONDS * 1.5)
+        return {"output": "brief"}
+
+    results = run_concurrently(flight, "waiters", fn)
+    assert len(calls) == 1, f"fn ran {len(calls)} times"
+    assert all(isinstance(result, tuple) and result[0] == {"output": "brief"} for result in results), results
+    assert sum(joined for _, joined in results) == len(results) - 1, "every caller but the leader should have joined"
+
+
+def check_errors(backend):
+    flight = SingleFlight(backend, LEASE_SECONDS, POLL_SECONDS)
+
+    def fn():
+        time.sleep(LEASE_SECONDS / 2)
+        raise RuntimeError("provider down")
+
+    results = run_concurrently(flight, "errors", fn)
+    assert sum(isinstance(result, RuntimeError) for result in results) == 1, "the leader should raise its own error"
+    shared = [result for result in results if isinstance(result, SingleFlightError)]
+    assert len(shared) == len(results) - 1 and all("provider down" in str(e) for e in shared), results
+
+
+def check_dead_leader(backend):
+    flight = SingleFlight(backend, LEASE_SECONDS, POLL_SECONDS)
+    # A leader that crashed without releasing: holds the lease and never renews it
+    assert backend.acquire("dead", "crashed", LEASE_SECONDS)
+    waits = []
+    started = time.time()
+    value, joined = flight.run("dead", lambda: "recovered", on_wait=lambda: waits.append(1))
+    assert (value, joined) == ("recovered", False) and waits, "the waiting caller did not take over"
+    assert time.time() - started >= LEASE_SECONDS * 0.9, "the lease was taken before it expired"
+
+
+CHECKS = [check_acquire, check_renew, check_takeover, check_waiters, check_errors, check_dead_leader]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the single-flight backends offline.")
+    parser.add_argument("--backends", nargs="+", choices=["local", "sqlite", "redis"], default=["local", "sqlite", "redis"])
+    args = parser.parse_args(argv)
+
+    factories = {
+        "local": LocalBackend,
+        "sqlite": lambda: SQLiteBackend(tempfile.mktemp(prefix="single-flight-check-", suffix=".sqlite3")),
+        "redis": lambda: RedisBackend(client=FakeRedis()),
+    }
+    failures = 0
+    for name in args.backends:
+        for check in CHECKS:
+            try:
+                check(factories[name]())
+            except AssertionError as e:
+                failures += 1
+                print(f"FAIL {name:7} {check.__name__}: {e}", flush=True)
+            else:
+                print(f"ok   {name:7} {check.__name__}", flush=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Startup benchmark for the Streamlit entry point: process cold start and first paint.
+
+Example:
+    python startup_benchmark.py --runs 5 --out startup.json
+
+Every sample runs in a fresh interpreter, so nothing is shared through sys.modules:
+
+    shell_import   import the modules the page shell needs
+    agent_import   import the agent stack (CrewAI, tools, litellm), paid by the first job
+    first_paint    process start until the first run of meeting_agent.py has rendered,
+                   using Streamlit's headless AppTest instead of a browser
+    server_ready   `streamlit run meeting_agent.py` until its health endpoint answers
+
+first_paint also records whether CrewAI was imported to render the page, which
+should stay false.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from benchmark import git_revision, percentile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = os.path.join(APP_DIR, "meeting_agent.py")
+
+SHELL_IMPORT = "import streamlit, jobs, meeting_inputs, metrics, result_cache, search_cache"
+AGENT_IMPORT = "import crews"
+# Prints the wall clock once the script's first run has rendered, for the parent to diff
+FIRST_PAINT = f"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({APP_SCRIPT!r}, default_timeout=120)
+app.run()
+print(json.dumps({{"painted_at": time.time(), "exception": bool(app.exception), "crewai_loaded": "crewai" in sys.modules}}))
+"""
+
+
+def child_env():
+    # Keep the samples' caches and metrics out of the real .cache directory
+    env = dict(os.environ)
+    env["MEETING_AGENT_CACHE_DIR"] = tempfile.mkdtemp(prefix="meeting-agent-startup-")
+    env["METRICS_PATH"] = ""
+    env["METRICS_PORT"] = "0"
+    return env
+
+
+def time_process(code):
+    started = time.time()
+    subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, env=child_env(), check=True, capture_output=True)
+    return time.time() - started
+
+
+def time_first_paint():
+    started = time.time()
+    completed = subprocess.run(
+        [sys.executable, "-c", FIRST_PAINT], cwd=APP_DIR, env=child_env(), check=True, capture_output=True, text=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return result["painted_at"] - started, result
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_server_ready(timeout=60):
+    port = free_port()
+    started = time.time()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", APP_SCRIPT, "--server.headless", "true",
+            "--server.address", "127.0.0.1", "--server.port", str(port), "--browser.gatherUsageStats", "false",
+        ],
+        cwd=APP_DIR, env=child_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.time() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.time() - started
+            except (urllib.error.URLError, OSError):
+                pass
+            if server.poll() is not None:
+                raise RuntimeError(f"streamlit exited with code {server.returncode}")
+            time.sleep(0.05)
+        raise RuntimeError(f"streamlit was not ready after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summarize(samples):
+    return {
+        "samples": [round(sample, 3) for sample in samples],
+        "p50": round(percentile(samples, 50), 3),
+        "min": round(min(samples), 3),
+        "max": round(max(samples), 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold start and first-paint time of the Streamlit app.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes sampled per measurement")
+    parser.add_argument("--skip-server", action="store_true", help="Don't start a real Streamlit server")
+    parser.add_argument("--out", default="startup.json", help="Where to write the machine-readable results")
+    args = parser.parse_args(argv)
+
+    # One unmeasured pass so every sample reads compiled bytecode, as a deployed container does
+    time_process(f"{SHELL_IMPORT}; {AGENT_IMPORT}")
+
+    shell_import = [time_process(SHELL_IMPORT) for _ in range(args.runs)]
+    agent_import = [time_process(AGENT_IMPORT) for _ in range(args.runs)]
+    first_paint, crewai_loaded, exceptions = [], False, False
+    for _ in range(args.runs):
+        seconds, result = time_first_paint()
+        first_paint.append(seconds)
+        crewai_loaded = crewai_loaded or result["crewai_loaded"]
+        exceptions = exceptions or result["exception"]
+    results = {
+        "shell_import_seconds": summarize(shell_import),
+        "agent_import_seconds": summarize(agent_import),
+        "first_paint_seconds": summarize(first_paint),
+    }
+    if not args.skip_server:
+        results["server_ready_seconds"] = summarize([time_server_ready() for _ in range(args.runs)])
+
+    report = {
+        "revision": git_revision(),
+        "created_at": time.time(),
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "first_paint_imports_crewai": crewai_loaded,
+        "first_paint_raised": exceptions,
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'measurement':22} {'p50':>7} {'min':>7} {'max':>7}")
+    for name, result in results.items():
+        print(f"{name:22} {result['p50']:>7.2f} {result['min']:>7.2f} {result['max']:>7.2f}")
+    print(f"CrewAI imported for first paint: {'yes' if crewai_loaded else 'no'}")
+    print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
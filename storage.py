@@ -0,0 +1,46 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Every on-disk store (result, search and single-flight databases, the metrics log) lives here
+CACHE_DIR = os.environ.get("MEETING_AGENT_CACHE_DIR", ".cache")
+
+
+def cache_path(filename):
+    return os.path.join(CACHE_DIR, filename)
+
+
+@contextmanager
+def connect(path):
+    # A short-lived connection per call keeps a database safe to share across
+    # Streamlit sessions, worker threads and processes; the block commits on success
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def init_database(path, *statements):
+    # Creates the file and its schema in WAL mode, so readers don't block the writer
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in statements:
+            conn.execute(statement)
+
+
+def singleton(factory):
+    """Return a getter that builds one process-wide instance with ``factory`` on first use."""
+    instance = []
+    lock = threading.Lock()
+
+    def get():
+        with lock:
+            if not instance:
+                instance.append(factory())
+            return instance[0]
+
+    return get
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# The app modules read these at import time, so set them before any test imports one
+os.environ["MEETING_AGENT_CACHE_DIR"] = tempfile.mkdtemp(prefix="meeting-agent-tests-")
+os.environ["METRICS_PATH"] = ""
+os.environ.setdefault("SERPER_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,196 @@
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import calendar_prep
+
+
+@pytest.mark.parametrize("summary, company", [
+    ("Acme <> Bob's Bakery", "Bob's Bakery"),
+    ("Acme / Initech intro", "Initech"),
+    ("Acme Inc x Globex Inc", "Globex Inc"),
+    ("Hooli x Acme", "Hooli"),
+    ("Discovery call with Globex Corporation - Q3", "Globex Corporation"),
+    ("Intro w/ Initech: pricing", "Initech"),
+    ("Umbrella sync (moved) <> Acme", "Umbrella"),
+    ("Call with Acme team", ""),
+    ("Weekly sync", ""),
+])
+def test_company_from_summary_drops_our_side(summary, company):
+    assert calendar_prep.company_from_summary(summary, "Acme Inc") == company
+
+
+UTC = timezone.utc
+CALENDAR = "\r\n".join([
+    "BEGIN:VCALENDAR",
+    "BEGIN:VEVENT",
+    "UID:berlin",
+    "DTSTART;TZID=Europe/Berlin:20260112T100000",
+    "DURATION:PT45M",
+    "SUMMARY:Discovery call with Globex Corporation",
+    "DESCRIPTION:Pricing and rollout timeline\\nJoin Zoom: https://zoom.us/j/1",
+    "ORGANIZER;CN=Ann Lee:mailto:ann@acme.com",
+    'ATTENDEE;CN="Scorpio, Hank";PARTSTAT=ACCEPTED:mailto:hank@globex.co.uk',
+    "ATTENDEE;CN=Bob;PARTSTAT=DECLINED:mailto:bob@globex.co.uk",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "UID:weekly",
+    "DTSTART:20260105T090000Z",
+    "DTEND:20260105T093000Z",
+    "RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=5",
+    "EXDATE:20260107T090000Z",
+    "SUMMARY:Acme <> Umbrella sync",
+    "ORGANIZER:mailto:ann@acme.com",
+    "ATTENDEE:mailto:al@umbrella-corp.com",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "UID:weekly",
+    "RECURRENCE-ID:20260112T090000Z",
+    "DTSTART:20260112T150000Z",
+    "DTEND:20260112T160000Z",
+    "SUMMARY:Acme <> Umbrella sync (moved)",
+    "ORGANIZER:mailto:ann@acme.com",
+    "ATTENDEE:mailto:al@umbrella-corp.com",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "UID:holiday",
+    "DTSTART;VALUE=DATE:20260112",
+    "SUMMARY:Company holiday with a very long title that the export folds onto",
+    "  a second line",
+    "END:VEVENT",
+    "END:VCALENDAR",
+])
+
+
+def events_by_uid():
+    events = calendar_prep.parse_events(CALENDAR, default_tz=UTC)
+    return {(event["uid"], "recurrence_id" in event): event for event in events}
+
+
+def make_event(summary, organizer, attendees, minutes=60, status=""):
+    start = datetime(2026, 1, 12, 9, tzinfo=UTC)
+    return {
+        "uid": "event", "status": status, "summary": summary, "description": "", "rrule": "", "exdates": set(),
+        "organizer": {"name": "", "email": organizer, "partstat": ""},
+        "attendees": [{"name": name, "email": email, "partstat": partstat} for name, email, partstat in attendees],
+        "start": start, "end": start + timedelta(minutes=minutes),
+    }
+
+
+def test_parse_property_keeps_quoted_colons():
+    assert calendar_prep.parse_property('ATTENDEE;CN="Lee: Ann";PARTSTAT=ACCEPTED:mailto:ann@acme.com') == (
+        "ATTENDEE", {"CN": "Lee: Ann", "PARTSTAT": "ACCEPTED"}, "mailto:ann@acme.com",
+    )
+
+
+def test_parse_events_times_and_text():
+    events = events_by_uid()
+    berlin = events[("berlin", False)]
+    assert berlin["start"] == datetime(2026, 1, 12, 10, tzinfo=ZoneInfo("Europe/Berlin"))
+    assert berlin["end"] - berlin["start"] == timedelta(minutes=45)
+    assert berlin["description"].splitlines()[0] == "Pricing and rollout timeline"
+    assert [person["name"] for person in berlin["attendees"]] == ["Scorpio, Hank", "Bob"]
+    assert events[("weekly", False)]["start"] == datetime(2026, 1, 5, 9, tzinfo=UTC)
+    holiday = events[("holiday", False)]
+    assert holiday["start"] == date(2026, 1, 12)
+    assert holiday["summary"].endswith("onto a second line")
+
+
+def test_weekly_rule_expands_byday_count_and_exdate():
+    weekly = events_by_uid()[("weekly", False)]
+    found = calendar_prep.occurrences(weekly, datetime(2026, 1, 1, tzinfo=UTC), datetime(2026, 3, 1, tzinfo=UTC))
+    # COUNT covers Jan 5, 7, 12, 14 and 19; Jan 7 is excluded
+    assert [when.day for when in found] == [5, 12, 14, 19]
+
+
+def test_daily_rule_with_interval_and_until():
+    event = make_event("Standup", "ann@acme.com", [])
+    event["rrule"] = "FREQ=DAILY;INTERVAL=2;UNTIL=20260118T090000Z"
+    found = calendar_prep.occurrences(event, datetime(2026, 1, 13, tzinfo=UTC), datetime(2026, 2, 1, tzinfo=UTC))
+    assert [when.day for when in found] == [14, 16, 18]
+
+
+def test_unsupported_rule_yields_first_occurrence_only():
+    event = make_event("Monthly review", "ann@acme.com", [])
+    event["rrule"] = "FREQ=MONTHLY;BYMONTHDAY=12"
+    found = calendar_prep.occurrences(event, datetime(2026, 1, 1, tzinfo=UTC), datetime(2026, 6, 1, tzinfo=UTC))
+    assert found == [event["start"]]
+
+
+def test_upcoming_meetings_applies_overrides_and_skips_all_day():
+    events = calendar_prep.parse_events(CALENDAR, default_tz=UTC)
+    meetings = calendar_prep.upcoming_meetings(events, datetime(2026, 1, 12, tzinfo=UTC), timedelta(days=3))
+    assert [(uid.split("@")[0], start) for uid, start, _ in meetings] == [
+        ("berlin", datetime(2026, 1, 12, 10, tzinfo=ZoneInfo("Europe/Berlin"))),
+        ("weekly", datetime(2026, 1, 12, 15, tzinfo=UTC)),
+        ("weekly", datetime(2026, 1, 14, 9, tzinfo=UTC)),
+    ]
+    assert meetings[1][2]["summary"].endswith("(moved)")
+
+
+def test_event_spec_maps_meeting_fields():
+    event = events_by_uid()[("berlin", False)]
+    spec, reason = calendar_prep.event_spec(event, ["acme.com"], "Acme")
+    assert reason is None
+    assert spec == {
+        "company_name": "Globex Corporation",
+        "meeting_objective": "Discovery call with Globex Corporation",
+        "attendees": "Scorpio, Hank (Globex Corporation)\nAnn Lee (our team)",
+        "meeting_duration": 45,
+        "focus_areas": "Pricing and rollout timeline",
+    }
+
+
+def test_event_spec_client_sent_invite_is_about_the_client():
+    event = make_event("Quarterly review", "jane@globex.com", [("Ann", "ann@acme-corp.com", ""), ("Bo", "bo@acme-corp.com", "")])
+    spec, _ = calendar_prep.event_spec(event, [], "Acme Inc")
+    assert spec["company_name"] == "Globex"
+    assert spec["attendees"] == "jane@globex.com (Globex)\nAnn (our team)\nBo (our team)"
+
+
+@pytest.mark.parametrize("summary, attendee", [
+    ("Lunch with John", ("John", "john@gmail.com", "")),
+    ("Catch-up with John Smith", ("", "john.smith@outlook.com", "")),
+    ("Coffee", ("John", "john@gmail.com", "")),
+    ("Acme <> John", ("John", "john@gmail.com", "")),
+])
+def test_event_spec_personal_mailboxes_need_a_company_in_the_title(summary, attendee):
+    event = make_event(summary, "ann@acme.com", [attendee])
+    assert calendar_prep.event_spec(event, ["acme.com"], "Acme Inc") == (None, "no client company found")
+
+
+@pytest.mark.parametrize("summary, company", [
+    ("Acme <> Bob's Bakery", "Bob's Bakery"),
+    ("Tasting with Bob's Bakery", "Bob's Bakery"),
+])
+def test_event_spec_personal_mailboxes_use_the_title_company(summary, company):
+    event = make_event(summary, "ann@acme.com", [("Bob", "bob@gmail.com", "")])
+    spec, _ = calendar_prep.event_spec(event, ["acme.com"], "Acme Inc")
+    assert spec["company_name"] == company
+    assert spec["attendees"] == f"Bob ({company})\nann@acme.com (our team)"
+
+
+@pytest.mark.parametrize("event, domains, reason", [
+    (make_event("Call with Hooli", "ann@acme.com", [("", "x@hooli.com", "")], status="CANCELLED"), ["acme.com"], "cancelled"),
+    (make_event("Team standup", "ann@acme.com", [("", "bo@acme.com", "")]), ["acme.com"], "no external attendees"),
+    (make_event("Call with Hooli", "ann@acme.com", [("", "x@hooli.com", "")]), [], "ambiguous (no attendee from our domain)"),
+])
+def test_event_spec_skips(event, domains, reason):
+    assert calendar_prep.event_spec(event, domains, "") == (None, reason)
+
+
+@pytest.mark.parametrize("minutes, duration", [(10, 15), (50, 45), (55, 60), (300, 180)])
+def test_event_spec_duration_fits_the_form(minutes, duration):
+    event = make_event("Call with Hooli", "ann@acme.com", [("", "x@hooli.com", "")], minutes=minutes)
+    assert calendar_prep.event_spec(event, ["acme.com"])[0]["meeting_duration"] == duration
+
+
+def test_off_peak_window_wraps_midnight():
+    window = calendar_prep.parse_window("22:00-06:00")
+    assert calendar_prep.seconds_until_window(datetime(2026, 1, 1, 23, 30), window) == 0
+    assert calendar_prep.seconds_until_window(datetime(2026, 1, 1, 5, 59), window) == 0
+    assert calendar_prep.seconds_until_window(datetime(2026, 1, 1, 21, 0), window) == 3600
+    assert calendar_prep.seconds_until_window(datetime(2026, 1, 1, 6, 0), window) == 16 * 3600
+    with pytest.raises(ValueError):
+        calendar_prep.parse_window("late")
@@ -0,0 +1,19 @@
+import benchmark
+import crews
+from jobs import Job
+
+
+def test_rejected_fast_tier_tasks_are_not_reported():
+    # Every fast-tier answer is unusable, so each fast stage is rerun on the strong tier
+    llms = {
+        "strong": benchmark.make_stub_llm(crews.MODEL_TIERS["strong"], tool_calls_per_task=0),
+        "fast": benchmark.make_stub_llm(crews.MODEL_TIERS["fast"], tool_calls_per_task=0, low_quality_rate=1.0),
+    }
+    job = Job("meeting_prep")
+    entry = crews.run_cached(
+        "meeting_prep", benchmark.bench_inputs("meeting_prep", 0), llms, crews.make_search_tool(), refresh=True,
+        task_callback=job.on_task,
+    )
+    assert entry["metrics"]["totals"]["fallbacks"] > 0
+    assert len(job.completed_stages) == len(crews.MEETING_STAGES)
+    assert not any("I cannot find enough information" in stage["output"] for stage in job.completed_stages)
@@ -0,0 +1,20 @@
+import pytest
+
+import crews
+import harvester
+from result_cache import get_result_cache
+
+
+def failing_search(query, page=1):
+    raise RuntimeError("403 Client Error: Forbidden")
+
+
+@pytest.mark.parametrize("kind, inputs", [
+    ("discovery", {"discovery_term": "generative ai", "discovery_region": ""}),
+    ("insta", {"insta_topic": "street food", "insta_region": "India"}),
+])
+def test_failed_searches_raise_and_are_not_cached(monkeypatch, kind, inputs):
+    monkeypatch.setattr(harvester, "serper_search", failing_search)
+    with pytest.raises(harvester.SearchFailed, match="403"):
+        crews.run_cached(kind, inputs, llms={}, search_tool=None)
+    assert get_result_cache().get(crews.result_key(kind, inputs)) is None